@@ -0,0 +1,368 @@
+# animate.py
+#
+# Zoom animation: a sequence of frames closing in on (or backing away
+# from) a target point, written out as it is made, to an animated PNG,
+# an animated GIF or numbered PNGs:
+#
+#   python animate.py --center=-0.743643887+0.131825904j --end-width 1e-6 -o zoom.png
+#   python animate.py --frames 300 -o frames/zoom_%04d.png
+#
+# The widths shrink geometrically, so a frame shows the previous one
+# magnified by a fixed factor. Only keyframes are iterated: each is
+# rendered `ratio` times as large as a frame, and the frames from its
+# width down to 1/ratio of it are cut out of it and resampled. With the
+# default ratio of 2 there is one keyframe per halving of the width, and
+# every other frame is only a resize.
+#
+# Keyframes are rendered on a process pool a few ahead of the frame
+# being written; no more than that, and one frame, are held in memory.
+
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import io
+import math
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from mandelbrot import MandelbrotSet, Viewport, colorize, compute_field, named_palette, parse_size
+from strips import PNG_SIGNATURE, png_header, sub_filter, write_chunk
+
+
+# Extra keyframe pixels on every side: the frame as wide as the keyframe
+# reaches half a pixel past it, and the resampling filter a bit further
+MARGIN = 4
+
+
+def frame_widths(start_width: float, end_width: float, frames: int) -> np.ndarray:
+    """Widths of the frames: geometric from start_width to end_width."""
+    if frames == 1:
+        return np.array([start_width])
+    return start_width * (end_width / start_width) ** (np.arange(frames) / (frames - 1))
+
+
+def keyframe_indices(widths: np.ndarray, ratio: float) -> np.ndarray:
+    """
+    For every frame, the keyframe it is cut from. Keyframe k is
+    max(widths) / ratio**k wide and serves the frames at most that wide
+    and more than 1/ratio of it. ratio has to be greater than 1.
+    """
+    if ratio <= 1:
+        raise ValueError(f"the keyframe ratio must be greater than 1, got {ratio}")
+    steps = np.log(widths.max() / widths) / math.log(ratio)
+    # Frames that land on a keyframe width up to rounding belong to it
+    return np.floor(steps + 1e-9).astype(int)
+
+
+def render_keyframe(
+    center: complex,
+    width: float,
+    size: Tuple[int, int],
+    mset: MandelbrotSet,
+    palette: str,
+    palette_size: int,
+) -> np.ndarray:
+    """Render one keyframe to an RGB array; runs in a worker process."""
+    viewport = Viewport(Image.new("RGB", size), center, width)
+    return colorize(compute_field(viewport, mset), named_palette(palette, palette_size))
+
+
+def resample(keyframe: Image.Image, key_scale: float, width: float, size: Tuple[int, int]) -> Image.Image:
+    """
+    The frame `width` wide around the keyframe's center, at size (w, h),
+    resampled from a keyframe with pixels key_scale apart.
+    """
+    w, h = size
+    kw, kh = keyframe.size
+    # Keyframe pixels per frame pixel. Pixel x samples x - w/2 pixels
+    # from the center, which in Pillow's coordinates (pixel centers at
+    # x + 0.5) puts the center at w/2 + 0.5 in both images.
+    q = (width / w) / key_scale
+    left = kw / 2 + 0.5 - (w / 2 + 0.5) * q
+    top = kh / 2 + 0.5 - (h / 2 + 0.5) * q
+    return keyframe.resize(size, Image.LANCZOS, box=(left, top, left + w * q, top + h * q))
+
+
+class SequenceWriter:
+    """Numbered PNG files, from a pattern such as frames/zoom_%04d.png."""
+
+    def __init__(self, pattern: str, size: Tuple[int, int], frames: int, fps: float):
+        self.pattern = pattern
+        self.frames_written = 0
+        directory = os.path.dirname(pattern % 0)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write_frame(self, image: Image.Image):
+        image.save(self.pattern % self.frames_written, format="PNG")
+        self.frames_written += 1
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        self.close()
+
+
+class APNGWriter:
+    """
+    Animated PNG written frame by frame. The frame count goes into the
+    header, so it has to be known up front.
+    """
+
+    def __init__(self, path: str, size: Tuple[int, int], frames: int, fps: float, level: int = 6):
+        if fps <= 0:
+            raise ValueError(f"fps must be positive, got {fps}")
+        # Frame delay as a fraction, delay_num / delay_den seconds, both
+        # 16-bit; the nearest one for very high or very low rates
+        delay = Fraction(1 / fps).limit_denominator(0xFFFF)
+        if delay.numerator > 0xFFFF:
+            delay = Fraction(0xFFFF)
+        if delay == 0:
+            delay = Fraction(1, 0xFFFF)
+        self.size, self.frames, self.level = size, frames, level
+        self.frames_written = 0
+        self._sequence = 0
+        self._delay = (delay.numerator, delay.denominator)
+        self._file = open(path, "wb")
+        self._file.write(PNG_SIGNATURE)
+        write_chunk(self._file, b"IHDR", png_header(*size))
+        # frame count, and 0 for looping forever
+        write_chunk(self._file, b"acTL", struct.pack(">II", frames, 0))
+
+    def _next_sequence(self) -> bytes:
+        number = struct.pack(">I", self._sequence)
+        self._sequence += 1
+        return number
+
+    def write_frame(self, image: Image.Image):
+        if self.frames_written == self.frames:
+            raise ValueError(f"the animation was declared with {self.frames} frames")
+        w, h = self.size
+        # Full-size frame at (0, 0), no disposal, replacing the previous one
+        control = struct.pack(">IIIIHHBB", w, h, 0, 0, *self._delay, 0, 0)
+        write_chunk(self._file, b"fcTL", self._next_sequence() + control)
+
+        data = zlib.compress(sub_filter(np.asarray(image.convert("RGB"))), self.level)
+        if self.frames_written == 0:
+            # The first frame doubles as the still image for plain PNG readers
+            write_chunk(self._file, b"IDAT", data)
+        else:
+            write_chunk(self._file, b"fdAT", self._next_sequence() + data)
+        self.frames_written += 1
+
+    def close(self):
+        if self.frames_written != self.frames:
+            raise ValueError(f"only {self.frames_written} of {self.frames} frames were written")
+        write_chunk(self._file, b"IEND", b"")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        if kind is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+def _skip_blocks(data: bytes, at: int) -> int:
+    """Position after the GIF data sub-blocks starting at `at`."""
+    while data[at]:
+        at += data[at] + 1
+    return at + 1
+
+
+class GIFWriter:
+    """
+    Animated GIF written frame by frame. Pillow only writes whole
+    animations, so each frame is encoded as a single GIF by Pillow (with
+    its own 256-color palette) and its color table and image data are
+    spliced into the animation.
+    """
+
+    def __init__(self, path: str, size: Tuple[int, int], frames: int, fps: float):
+        if fps <= 0:
+            raise ValueError(f"fps must be positive, got {fps}")
+        self.size = size
+        self.frames_written = 0
+        self._delay = min(max(1, round(100 / fps)), 0xFFFF)    # hundredths of a second
+        self._file = open(path, "wb")
+        # Logical screen without a global color table
+        self._file.write(b"GIF89a" + struct.pack("<HHBBB", *size, 0, 0, 0))
+        # Loop forever
+        self._file.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", 0) + b"\x00")
+
+    @staticmethod
+    def _encode(image: Image.Image) -> Tuple[int, bytes, bytes]:
+        """Color table size bits, color table and LZW data of a one-frame GIF."""
+        buffer = io.BytesIO()
+        image.convert("RGB").quantize(256).save(buffer, format="GIF")
+        data = buffer.getvalue()
+
+        at, bits, table = 13, 0, b""
+        if data[10] & 0x80:
+            bits = data[10] & 7
+            table = data[at:at + 3 * 2 ** (bits + 1)]
+            at += len(table)
+        while data[at] == 0x21:    # extensions: label, then sub-blocks
+            at = _skip_blocks(data, at + 2)
+        if data[at] != 0x2C:
+            raise ValueError("unexpected GIF layout from Pillow")
+        packed = data[at + 9]
+        at += 10
+        if packed & 0x80:
+            bits = packed & 7
+            table = data[at:at + 3 * 2 ** (bits + 1)]
+            at += len(table)
+        # LZW minimum code size, then the sub-blocks
+        return bits, table, data[at:_skip_blocks(data, at + 1)]
+
+    def write_frame(self, image: Image.Image):
+        bits, table, pixels = self._encode(image)
+        # Graphic control: no disposal, the delay, no transparency
+        self._file.write(b"\x21\xf9\x04\x04" + struct.pack("<H", self._delay) + b"\x00\x00")
+        # Image descriptor with a local color table
+        self._file.write(b"\x2c" + struct.pack("<HHHHB", 0, 0, *self.size, 0x80 | bits))
+        self._file.write(table + pixels)
+        self.frames_written += 1
+
+    def close(self):
+        self._file.write(b"\x3b")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        self.close()
+
+
+def open_writer(output: str, size: Tuple[int, int], frames: int, fps: float):
+    """The writer for an output name: a %-pattern, a .gif or a .png/.apng."""
+    if "%" in output:
+        return SequenceWriter(output, size, frames, fps)
+    if output.lower().endswith(".gif"):
+        return GIFWriter(output, size, frames, fps)
+    return APNGWriter(output, size, frames, fps)
+
+
+def render_zoom(
+    center: complex,
+    start_width: float,
+    end_width: float,
+    frames: int,
+    size: Tuple[int, int],
+    writer,
+    mset: MandelbrotSet,
+    palette: str = "turbo",
+    palette_size: int = 512,
+    ratio: float = 2.0,
+    workers: Optional[int] = None,
+    progress: Callable[[int, int], None] = None,
+) -> Dict[str, int]:
+    """
+    Write `frames` frames of size = (w, h) around `center`, from
+    start_width to end_width wide, into `writer`, calling
+    progress(frames_done, frames) after each one. Returns how many
+    keyframes were rendered and how many frames resampled from them.
+    """
+    widths = frame_widths(start_width, end_width, frames)
+    keys = keyframe_indices(widths, ratio)
+    top = widths.max()
+    key_size = (round(size[0] * ratio) + 2 * MARGIN, round(size[1] * ratio) + 2 * MARGIN)
+
+    def key_scale(k):
+        return top / ratio ** k / round(size[0] * ratio)
+
+    # Keyframes in the order the frames need them
+    order: List[int] = list(dict.fromkeys(keys.tolist()))
+    workers = workers or os.cpu_count()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+
+        def submit_next():
+            if len(pending) < len(order):
+                k = order[len(pending)]
+                pending[k] = executor.submit(
+                    render_keyframe, center, key_scale(k) * key_size[0], key_size,
+                    mset, palette, palette_size,
+                )
+
+        # Keep every worker busy, but no further ahead
+        for _ in range(workers + 1):
+            submit_next()
+
+        current, keyframe = None, None
+        for i, (width, k) in enumerate(zip(widths, keys)):
+            if k != current:
+                keyframe = Image.fromarray(pending[k].result())
+                pending[k] = None    # done with it, free the array
+                current = k
+                submit_next()
+            writer.write_frame(resample(keyframe, key_scale(k), width, size))
+            if progress is not None:
+                progress(i + 1, frames)
+
+    return {"keyframes": len(order), "frames": frames}
+
+
+def parse_fps(text: str) -> float:
+    """Parse a frame rate, which has to be positive."""
+    try:
+        fps = float(text)
+    except ValueError:
+        fps = 0.0
+    if not fps > 0:
+        raise argparse.ArgumentTypeError(f"expected a positive frame rate, got {text!r}")
+    return fps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a zoom animation.")
+    parser.add_argument("--center", type=complex, default=complex(-0.743643887, 0.131825904),
+                        help="the point zoomed into")
+    parser.add_argument("--start-width", type=float, default=3.5)
+    parser.add_argument("--end-width", type=float, default=1e-4)
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--fps", type=parse_fps, default=30)
+    parser.add_argument("--size", type=parse_size, default=(640, 480))
+    parser.add_argument("--ratio", type=float, default=2.0,
+                        help="keyframe size relative to a frame, greater than 1; one "
+                             "keyframe per this factor of zoom (default 2)")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--palette", default="turbo")
+    parser.add_argument("--palette-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of processes (default: one per CPU)")
+    parser.add_argument("-o", "--output", default="zoom.png",
+                        help="a .png (animated), a .gif, or a pattern like frames/%%04d.png")
+    args = parser.parse_args(argv)
+
+    mset = MandelbrotSet(max_iterations=args.iterations)
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} frames ({time.perf_counter() - start:.0f} s)", end="", flush=True)
+
+    with open_writer(args.output, args.size, args.frames, args.fps) as writer:
+        counts = render_zoom(
+            args.center, args.start_width, args.end_width, args.frames, args.size, writer,
+            mset, args.palette, args.palette_size, args.ratio, args.workers, progress,
+        )
+    print(f"\n{counts['frames']} frames from {counts['keyframes']} keyframes, saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# batch.py
+#
+# Render many views from a JSON or CSV manifest on a process pool.
+# Each job is one view; jobs whose PNG already exists with the same
+# parameter hash are skipped, and a JSON summary records wall time and
+# iterations performed per job.
+#
+#   python batch.py views.json --workers 8 --summary summary.json
+#
+# JSON manifests are a list of objects; CSV manifests have one header
+# row. Recognised keys (all but "output" are optional; an empty CSV cell
+# counts as left out):
+#   output, center, width, size, palette, palette_size
+#   and any MandelbrotSet setting (max_iterations, escape_radius, ...)
+#
+# A job that fails is recorded as "failed" with its error, the other
+# jobs still run, and the exit status is 1.
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from typing import Dict, List
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from mandelbrot import MandelbrotSet, Viewport, named_palette, paint, parse_size
+
+
+# Values used for any key a manifest entry leaves out
+DEFAULTS = {
+    "center": "-0.75+0j",
+    "width": 3.5,
+    "size": "800x600",
+    "palette": "turbo",
+    "palette_size": 512,
+    "max_iterations": 300,
+}
+
+# PNG text chunk holding the parameter hash of the job that wrote it
+HASH_KEY = "mandelbrot-params"
+
+
+def _mset_fields() -> Dict[str, object]:
+    """MandelbrotSet settings a manifest may set, with their defaults."""
+    return {f.name: f.default for f in fields(MandelbrotSet) if f.init}
+
+
+def _coerce(value, default):
+    """Convert a manifest value (possibly a CSV string) to the default's type."""
+    if not isinstance(value, str) or isinstance(default, str):
+        return value
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes")
+    return type(default)(value)
+
+
+def normalize(entry: dict) -> dict:
+    """Fill in defaults and convert types, so equal views hash equally."""
+    if not entry.get("output"):
+        raise ValueError(f"manifest entry has no output: {entry!r}")
+    # Empty CSV cells (and short CSV rows) mean "use the default"
+    entry = {key: value for key, value in entry.items() if value not in ("", None)}
+
+    job = {"output": entry["output"]}
+    job["center"] = str(complex(str(entry.get("center", DEFAULTS["center"])).replace(" ", "")))
+    job["width"] = float(entry.get("width", DEFAULTS["width"]))
+    job["size"] = "x".join(map(str, parse_size(str(entry.get("size", DEFAULTS["size"])))))
+    job["palette"] = str(entry.get("palette", DEFAULTS["palette"]))
+    job["palette_size"] = int(entry.get("palette_size", DEFAULTS["palette_size"]))
+
+    for name, default in _mset_fields().items():
+        default = DEFAULTS.get(name, default)
+        job[name] = _coerce(entry.get(name, default), default)
+    return job
+
+
+def job_hash(job: dict) -> str:
+    """Hash of everything that affects the rendered image (not its path)."""
+    params = {key: value for key, value in job.items() if key != "output"}
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def is_current(job: dict) -> bool:
+    """True if the job's output exists and was rendered with these params."""
+    try:
+        with Image.open(job["output"]) as image:
+            return image.info.get(HASH_KEY) == job_hash(job)
+    except (FileNotFoundError, OSError):
+        return False
+
+
+def render_job(job: dict) -> dict:
+    """Render one manifest job (runs in a worker process)."""
+    start = time.perf_counter()
+
+    image = Image.new("RGB", parse_size(job["size"]))
+    viewport = Viewport(image, complex(job["center"]), job["width"])
+    mset = MandelbrotSet(**{name: job[name] for name in _mset_fields()})
+    paint(viewport, mset, named_palette(job["palette"], job["palette_size"]))
+
+    info = PngInfo()
+    info.add_text(HASH_KEY, job_hash(job))
+    os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+    image.save(job["output"], format="PNG", pnginfo=info)
+
+    return {
+        "output": job["output"],
+        "status": "rendered",
+        "seconds": time.perf_counter() - start,
+        "iterations": mset.work,
+        "skipped_interior": mset.skipped,
+    }
+
+
+def load_manifest(path: str) -> List[dict]:
+    """Read a JSON list or a CSV file of view descriptions."""
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            return list(csv.DictReader(f))
+        return json.load(f)
+
+
+def run(manifest: List[dict], workers: int = None, force: bool = False) -> List[dict]:
+    """
+    Render every job in the manifest and return one summary row per job,
+    in manifest order. Up-to-date outputs are skipped unless force=True.
+    A job that cannot be read or rendered gets status "failed" and its
+    error; the others are not affected.
+    """
+    results: List[dict] = [None] * len(manifest)
+
+    def skipped(output, status, **extra) -> dict:
+        return dict({"output": output, "status": status, "seconds": 0.0,
+                     "iterations": 0, "skipped_interior": 0}, **extra)
+
+    jobs, todo = {}, []
+    for i, entry in enumerate(manifest):
+        try:
+            jobs[i] = normalize(entry)
+        except Exception as error:
+            results[i] = skipped(entry.get("output"), "failed", error=repr(error))
+            print(f"entry {i}: failed: {error!r}")
+            continue
+        if not force and is_current(jobs[i]):
+            results[i] = skipped(jobs[i]["output"], "up to date")
+        else:
+            todo.append(i)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(render_job, jobs[i]): i for i in todo}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as error:
+                results[i] = skipped(jobs[i]["output"], "failed", error=repr(error))
+                print(f"{jobs[i]['output']}: failed: {error!r}")
+                continue
+            print(f"{results[i]['output']}: {results[i]['seconds']:.2f}s")
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a manifest of Mandelbrot views.")
+    parser.add_argument("manifest", help="JSON or CSV file describing the views")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of processes (default: one per CPU)")
+    parser.add_argument("--summary", default="batch_summary.json",
+                        help="where to write the per-job summary")
+    parser.add_argument("--force", action="store_true",
+                        help="re-render views even if their output is up to date")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run(load_manifest(args.manifest), args.workers, args.force)
+    summary = {
+        "jobs": results,
+        "rendered": sum(r["status"] == "rendered" for r in results),
+        "failed": sum(r["status"] == "failed" for r in results),
+        "wall_seconds": time.perf_counter() - start,
+        "iterations": sum(r["iterations"] for r in results),
+    }
+    with open(args.summary, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Rendered {summary['rendered']} of {len(results)} views; summary in {args.summary}")
+    if summary["failed"]:
+        print(f"{summary['failed']} views failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
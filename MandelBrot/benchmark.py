@@ -0,0 +1,248 @@
+# benchmark.py
+#
+# Compare every way this repo can compute the Mandelbrot set on the same
+# views, sizes and iteration limits. Reports Mpixels/s, iterations/s and
+# peak memory per run, checks that each engine agrees with the reference
+# (the vectorized MandelbrotSet), and writes the results as JSON so runs
+# can be compared over time.
+#
+#   python benchmark.py --sizes 160x120 320x240 --iterations 100 500
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+import mandelbrot
+from mandelbrot import MandelbrotSet, Viewport, compute_field, parse_size
+
+# The tutorial scripts live next door; append so our viewport.py wins
+MATERIALS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "materials-mandelbrot-set-python")
+sys.path.append(MATERIALS)
+
+
+VIEWS = {
+    "full-set": (complex(-0.75, 0.0), 3.5),
+    "seahorse-valley": (complex(-0.745, 0.11), 0.05),
+    "deep-boundary": (complex(-0.743643887037151, 0.13182590420533), 1e-9),
+}
+
+
+@dataclass
+class Engine:
+    """
+    One way of computing the set. `run(viewport, max_iterations)` returns
+    escape counts in MandelbrotSet.escape_count's convention, or a
+    boolean "inside" mask when membership_only is set.
+    """
+    name: str
+    run: Callable[[Viewport, int], np.ndarray]
+    scalar: bool = False              # one Python call per pixel
+    membership_only: bool = False
+
+
+def _per_pixel(function, viewport: Viewport, dtype=np.int64) -> np.ndarray:
+    grid = viewport.complex_grid()
+    return np.array([function(c) for c in grid.ravel()], dtype=dtype).reshape(grid.shape)
+
+
+def _from_zero_based(counts: np.ndarray, max_iterations: int) -> np.ndarray:
+    """mandelbrot_02/03 count escapes from 0 instead of 1."""
+    return np.where(counts < max_iterations, counts + 1, max_iterations)
+
+
+def _mymandel_counts(stability: np.ndarray, max_iterations: int) -> np.ndarray:
+    """mymandel's stability is (count - 1) / max, or 1 when bounded."""
+    counts = np.rint(stability * max_iterations).astype(np.int64) + 1
+    return np.where(stability == 1, max_iterations, counts)
+
+
+def engines() -> List[Engine]:
+    """All engines that can be imported in this environment."""
+    import guessing
+    import tiled
+
+    found = [
+        Engine("mandelbrot.scalar",
+               lambda vp, n: _per_pixel(MandelbrotSet(n).escape_count, vp), scalar=True),
+        Engine("mandelbrot.array",
+               lambda vp, n: MandelbrotSet(n).escape_count_array(vp.complex_grid())),
+        Engine("mandelbrot.array-no-cardioid",
+               lambda vp, n: MandelbrotSet(n, cardioid_check=False).escape_count_array(vp.complex_grid())),
+        Engine("mandelbrot.array-periodicity",
+               lambda vp, n: MandelbrotSet(n, periodicity_check=True).escape_count_array(vp.complex_grid())),
+        Engine("mandelbrot.mirrored",
+               lambda vp, n: compute_field(vp, MandelbrotSet(n)).escape_count()),
+        Engine("mandelbrot.tiled",
+               lambda vp, n: tiled.compute_field_tiled(vp, MandelbrotSet(n)).escape_count()),
+        Engine("mandelbrot.guessed",
+               lambda vp, n: guessing.compute_field_guessed(vp, MandelbrotSet(n))[0].escape_count()),
+    ]
+
+    optional = [
+        ("mymandel", lambda m: [
+            Engine("mymandel.scalar", lambda vp, n: _mymandel_counts(
+                _per_pixel(m.MandelbrotSet(n, 2.0).stability, vp, np.float64), n), scalar=True),
+            Engine("mymandel.array", lambda vp, n: _mymandel_counts(
+                m.MandelbrotSet(n, 2.0).stability_array(vp.complex_grid()), n)),
+        ]),
+        ("mandelbrot_01", lambda m: [
+            Engine("mandelbrot_01.scalar", lambda vp, n: _per_pixel(
+                m.MandelbrotSet(n).__contains__, vp, bool), scalar=True, membership_only=True),
+        ]),
+        ("mandelbrot_02", lambda m: [
+            Engine("mandelbrot_02.scalar", lambda vp, n: _from_zero_based(
+                _per_pixel(m.MandelbrotSet(n).escape_count, vp), n), scalar=True),
+        ]),
+        ("mandelbrot_03", lambda m: [
+            Engine("mandelbrot_03.scalar", lambda vp, n: _from_zero_based(
+                _per_pixel(m.MandelbrotSet(n).escape_count, vp), n), scalar=True),
+            Engine("mandelbrot_03.array", lambda vp, n: _from_zero_based(
+                m.MandelbrotSet(n).escape_count_array(vp.complex_grid()), n)),
+        ]),
+        ("02_bw_plot", lambda m: [
+            Engine("is_stable", lambda vp, n: m.is_stable(vp.complex_grid(), n),
+                   membership_only=True),
+        ]),
+    ]
+    for module_name, make in optional:
+        try:
+            found.extend(make(importlib.import_module(module_name)))
+        except ImportError as error:
+            print(f"skipping {module_name}: {error}", file=sys.stderr)
+    return found
+
+
+def _measure(engine: Engine, viewport: Viewport, max_iterations: int, memory: bool):
+    """Run an engine once; return (result, seconds, peak bytes or None)."""
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = engine.run(viewport, max_iterations)
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def agreement(engine: Engine, result: np.ndarray, reference: np.ndarray, max_iterations: int) -> float:
+    """Fraction of pixels on which an engine matches the reference counts."""
+    if engine.membership_only:
+        return float(np.mean(result == (reference == max_iterations)))
+    return float(np.mean(result == reference))
+
+
+def run(
+    views: Dict[str, tuple],
+    sizes: List[tuple],
+    iteration_limits: List[int],
+    engine_names: Optional[List[str]] = None,
+    repeats: int = 1,
+    scalar_budget: float = 5e6,
+    memory: bool = True,
+    tolerance: float = 1e-3,
+) -> List[dict]:
+    """
+    Benchmark the engines and return one record per (engine, view, size,
+    iteration limit). Scalar engines are skipped when pixels * iterations
+    exceeds scalar_budget. A run passes when it disagrees with the
+    reference on at most `tolerance` of the pixels.
+    """
+    selected = [e for e in engines() if engine_names is None or e.name in engine_names]
+    records = []
+
+    for view_name, (center, width) in views.items():
+        for size in sizes:
+            for max_iterations in iteration_limits:
+                viewport = Viewport(Image.new("RGB", size), center, width)
+                reference = MandelbrotSet(max_iterations).escape_count_array(viewport.complex_grid())
+                # Work every engine has to do, whatever tricks it uses
+                iterations = int(reference.sum())
+                pixels = size[0] * size[1]
+
+                for engine in selected:
+                    record = {
+                        "engine": engine.name, "view": view_name,
+                        "size": f"{size[0]}x{size[1]}", "max_iterations": max_iterations,
+                    }
+                    if engine.scalar and pixels * max_iterations > scalar_budget:
+                        records.append(dict(record, status="skipped"))
+                        continue
+
+                    times = []
+                    for _ in range(repeats):
+                        result, seconds, _ = _measure(engine, viewport, max_iterations, False)
+                        times.append(seconds)
+                    peak = None
+                    if memory:
+                        _, _, peak = _measure(engine, viewport, max_iterations, True)
+
+                    best = min(times)
+                    agree = agreement(engine, result, reference, max_iterations)
+                    record.update(
+                        status="ok" if agree >= 1 - tolerance else "MISMATCH",
+                        seconds=best,
+                        mpixels_per_s=pixels / best / 1e6,
+                        iterations_per_s=iterations / best,
+                        peak_bytes=peak,
+                        agreement=agree,
+                    )
+                    records.append(record)
+                    print(
+                        f"{engine.name:32} {view_name:16} {record['size']:>10} {max_iterations:>6}"
+                        f"  {record['mpixels_per_s']:8.3f} Mpx/s  {record['iterations_per_s']:10.3g} it/s"
+                        f"  {record['status']}"
+                    )
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Mandelbrot render paths.")
+    parser.add_argument("--views", nargs="+", choices=sorted(VIEWS), default=sorted(VIEWS))
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[(64, 48), (160, 120), (320, 240)])
+    parser.add_argument("--iterations", nargs="+", type=int, default=[100, 500])
+    parser.add_argument("--engines", nargs="+", help="only run these engines")
+    parser.add_argument("--repeats", type=int, default=1, help="report the best of this many runs")
+    parser.add_argument("--scalar-budget", type=float, default=5e6,
+                        help="skip per-pixel engines above this many pixel-iterations")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip the (slower) tracemalloc peak-memory run")
+    parser.add_argument("--tolerance", type=float, default=1e-3,
+                        help="allowed fraction of pixels disagreeing with the reference")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    records = run(
+        {name: VIEWS[name] for name in args.views}, args.sizes, args.iterations,
+        args.engines, args.repeats, args.scalar_budget, args.memory, args.tolerance,
+    )
+    results = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": records,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {len(records)} results to {args.output}")
+
+    if any(r["status"] == "MISMATCH" for r in records):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# cache.py
+#
+# Disk cache of raw escape fields, so the same view can be recolored or
+# resized without iterating it again. Entries are plain .npy files that
+# are memory-mapped on load; the least recently used ones are deleted
+# once the cache grows past its byte budget.
+#
+# Each FieldCache keeps a running total of the directory size and only
+# lists the directory when that total passes the budget; it then evicts
+# down to EVICT_TO of the budget, so the next scan is a while off. Other
+# processes writing to the same directory are only seen at the next
+# scan, so the budget can be overshot for a moment.
+#
+# Next to the entries, the cache can keep one resumable snapshot per view
+# (any iteration limit), so raising max_iterations only iterates the
+# points that were still bounded.
+
+from dataclasses import fields
+from typing import Callable, Optional
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from mandelbrot import EscapeField, MandelbrotSet, Viewport
+
+
+# Fraction of max_bytes an eviction brings the cache down to
+EVICT_TO = 0.9
+
+
+def view_key(viewport: Viewport, mset: MandelbrotSet, ignore=()) -> str:
+    """
+    Hash of everything that affects the escape field of a view, except
+    the MandelbrotSet settings named in `ignore`.
+    """
+    width, height = viewport.image.size
+    params = {
+        "center": [viewport.center.real, viewport.center.imag],
+        "width": viewport.width,
+        "size": [width, height],
+        "mset": {
+            f.name: getattr(mset, f.name)
+            for f in fields(mset) if f.init and f.name not in ignore
+        },
+    }
+    text = json.dumps(params, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class FieldCache:
+    """
+    LRU cache of escape fields under `directory`, limited to max_bytes.
+
+    Each entry is a single record with one float32 (height, width) field
+    per channel: iteration count, |z| at escape and, when the set
+    computes them, the cycle period and the distance estimate. The field
+    names say which channels an entry holds.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._total = None    # bytes in the directory, as far as we know
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".npy")
+
+    def _snapshot_path(self, viewport: Viewport, mset: MandelbrotSet) -> str:
+        key = view_key(viewport, mset, ignore=("max_iterations",))
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, viewport: Viewport, mset: MandelbrotSet) -> Optional[EscapeField]:
+        """
+        Return the cached field for this view, or None. The channels are
+        read-only float32 views onto the memory-mapped file.
+        """
+        path = self._path(view_key(viewport, mset))
+        try:
+            data = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+
+        os.utime(path)   # mark as recently used
+        names = data.dtype.names
+        return EscapeField(
+            data["iterations"], data["magnitude"], mset.max_iterations,
+            period=data["period"] if "period" in names else None,
+            distance=data["distance"] if "distance" in names else None,
+        )
+
+    def put(self, viewport: Viewport, mset: MandelbrotSet, field: EscapeField):
+        """
+        Store a field for this view, then evict old entries if needed.
+        The field must have the channels mset computes.
+        """
+        if (field.period is not None) != mset.periodicity_check:
+            raise ValueError("field's period channel does not match mset.periodicity_check")
+        if (field.distance is not None) != mset.distance_estimate:
+            raise ValueError("field's distance channel does not match mset.distance_estimate")
+
+        channels = {"iterations": field.iterations, "magnitude": field.magnitude}
+        if field.period is not None:
+            channels["period"] = field.period
+        if field.distance is not None:
+            channels["distance"] = field.distance
+        shape = field.iterations.shape
+        data = np.zeros((), dtype=[(name, np.float32, shape) for name in channels])
+        for name, channel in channels.items():
+            data[name] = channel
+
+        # Write to a temporary file first so readers never see half an entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, data)
+        size = os.path.getsize(tmp)
+        os.replace(tmp, self._path(view_key(viewport, mset)))
+        self._added(size)
+
+    def get_snapshot(self, viewport: Viewport, mset: MandelbrotSet) -> Optional[EscapeField]:
+        """
+        Return the resumable snapshot of this view if one exists with at
+        most mset.max_iterations iterations, otherwise None.
+        """
+        path = self._snapshot_path(viewport, mset)
+        try:
+            field = EscapeField.load(path)
+        except FileNotFoundError:
+            return None
+        if field.max_iterations > mset.max_iterations:
+            return None
+        os.utime(path)
+        return field
+
+    def put_snapshot(self, viewport: Viewport, mset: MandelbrotSet, field: EscapeField):
+        """
+        Keep a field with saved state (keep_state=True) for later resuming,
+        unless the view already has a snapshot that went further.
+        """
+        path = self._snapshot_path(viewport, mset)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if int(data["max_iterations"]) > field.max_iterations:
+                    return
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            field.save(f)
+        size = os.path.getsize(tmp)
+        os.replace(tmp, path)
+        self._added(size)
+
+    def fetch(
+        self,
+        viewport: Viewport,
+        mset: MandelbrotSet,
+        compute: Callable[[Viewport, MandelbrotSet], EscapeField] = None,
+    ) -> EscapeField:
+        """
+        Return the cached field, computing and storing it on a miss.
+
+        Without a `compute` function, a miss is served from this view's
+        snapshot when there is one (iterating only the still-bounded
+        points), else by a single-core render; either way a new snapshot
+        is kept so the next increase of max_iterations is cheap too.
+        """
+        field = self.get(viewport, mset)
+        if field is not None:
+            return field
+
+        if compute is not None:
+            field = compute(viewport, mset)
+        else:
+            snapshot = self.get_snapshot(viewport, mset)
+            if snapshot is not None:
+                field = mset.resume(snapshot)
+            else:
+                field = mset.escape_field(viewport.complex_grid(), keep_state=True)
+            self.put_snapshot(viewport, mset, field)
+
+        self.put(viewport, mset, field)
+        return field
+
+    def _added(self, size: int):
+        """Count a new entry, and evict once the running total is over budget."""
+        if self._total is not None:
+            self._total += size
+        if self._total is None or self._total > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        List the directory and, if it is over max_bytes, delete least
+        recently used entries until it is down to EVICT_TO of that.
+        """
+        # Other processes may share the directory and delete entries too
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith((".npy", ".npz")):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes if total <= self.max_bytes else EVICT_TO * self.max_bytes
+        for _, size, name in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total = total
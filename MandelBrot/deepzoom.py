@@ -0,0 +1,220 @@
+# deepzoom.py
+#
+# Perturbation-theory renderer for zooms far beyond float64 precision.
+#
+# One reference orbit Z_n is computed with Python's Decimal at whatever
+# precision the zoom needs. Every pixel is then iterated as a small
+# float64 offset from it, all pixels at once:
+#
+#     dz_{n+1} = 2 * Z_n * dz_n + dz_n**2 + dc,    z_n = Z_n + dz_n
+#
+# Where the offset stops being small compared with the reference
+# (|Z_n + dz_n| << |Z_n|) the float64 result is wrong ("glitched"); those
+# pixels are redone against a new reference picked among them.
+
+from dataclasses import dataclass
+from decimal import Decimal, localcontext
+from typing import Dict, List, Tuple
+import argparse
+import math
+
+import numpy as np
+from PIL import Image
+
+from mandelbrot import EscapeField, MandelbrotSet, named_palette, paint_field, parse_size
+
+
+@dataclass
+class DeepViewport:
+    """
+    Like mandelbrot.Viewport, but the center is kept as two Decimals so
+    it can be given to as many digits as the zoom requires.
+    """
+    image: Image.Image
+    center_real: Decimal
+    center_imag: Decimal
+    width: float
+
+    @property
+    def scale(self) -> float:
+        return self.width / self.image.width
+
+    @property
+    def height(self) -> float:
+        return self.scale * self.image.height
+
+    def delta_grid(self) -> np.ndarray:
+        """Offset of every pixel from the center, as float64 complex."""
+        w, h = self.image.size
+        grid = np.empty((h, w), dtype=np.complex128)
+        grid.real = (-self.width / 2 + np.arange(w) * self.scale)[np.newaxis, :]
+        grid.imag = (self.height / 2 - np.arange(h) * self.scale)[:, np.newaxis]
+        return grid
+
+    def digits(self) -> int:
+        """Decimal precision needed to resolve single pixels."""
+        return max(30, int(-math.log10(self.scale)) + 20)
+
+
+def reference_orbit(
+    c_real: Decimal, c_imag: Decimal, max_iterations: int, escape_radius: float, digits: int
+) -> np.ndarray:
+    """
+    High-precision orbit Z_0 = 0, Z_1, ... of one point, rounded to
+    complex128. Stops early if the reference itself escapes.
+    """
+    orbit = [0j]
+    with localcontext() as ctx:
+        ctx.prec = digits
+        zr = zi = Decimal(0)
+        r2 = Decimal(escape_radius) ** 2
+        for _ in range(max_iterations):
+            zr, zi = zr * zr - zi * zi + c_real, 2 * zr * zi + c_imag
+            orbit.append(complex(float(zr), float(zi)))
+            if zr * zr + zi * zi > r2:
+                break
+    return np.array(orbit)
+
+
+def perturb(
+    dc: np.ndarray,
+    orbit: np.ndarray,
+    max_iterations: int,
+    escape_radius: float,
+    glitch_tolerance: float = 1e-3,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Iterate the offsets dc (1-D) against a reference orbit. Returns
+    (iterations, magnitude, glitched, work) in escape_time's conventions;
+    glitched pixels have no valid result and need another reference.
+    """
+    r2 = escape_radius * escape_radius
+    tol2 = glitch_tolerance * glitch_tolerance
+    orbit_mag2 = orbit.real * orbit.real + orbit.imag * orbit.imag
+
+    iterations = np.full(dc.size, -1, dtype=np.int32)
+    magnitude = np.zeros(dc.size, dtype=np.float64)
+    glitched = np.zeros(dc.size, dtype=bool)
+    work = 0
+
+    index = np.arange(dc.size)
+    dc_live = dc.copy()
+    dz = np.zeros(dc.size, dtype=np.complex128)
+
+    for n in range(max_iterations):
+        if n + 1 >= orbit.size:
+            # The reference escaped before these pixels did
+            glitched[index] = True
+            break
+
+        dz = (2 * orbit[n] + dz) * dz + dc_live
+        z = orbit[n + 1] + dz
+        mag2 = z.real * z.real + z.imag * z.imag
+        work += dz.size
+
+        escaped = mag2 > r2
+        iterations[index[escaped]] = n + 1
+        magnitude[index[escaped]] = np.sqrt(mag2[escaped])
+
+        glitch = ~escaped & (mag2 < tol2 * orbit_mag2[n + 1])
+        glitched[index[glitch]] = True
+
+        keep = ~(escaped | glitch)
+        if not keep.all():
+            index, dz, dc_live = index[keep], dz[keep], dc_live[keep]
+            if index.size == 0:
+                break
+
+    return iterations, magnitude, glitched, work
+
+
+def compute_field_deep(
+    viewport: DeepViewport,
+    mset: MandelbrotSet,
+    max_references: int = 16,
+    glitch_tolerance: float = 1e-3,
+) -> Tuple[EscapeField, Dict[str, int]]:
+    """
+    Compute the escape field of a deep zoom by perturbation.
+
+    The first reference is the view center. While glitched pixels
+    remain (and max_references allows), the glitched pixel nearest their
+    centroid becomes the next reference and only the glitched pixels are
+    iterated again. Returns the field and a dict with the number of
+    references used and of pixels still glitched at the end.
+    """
+    dc = viewport.delta_grid().ravel()
+    digits = viewport.digits()
+
+    iterations = np.full(dc.size, -1, dtype=np.int32)
+    magnitude = np.zeros(dc.size, dtype=np.float64)
+    todo = np.arange(dc.size)
+    ref_offset = 0j      # reference position relative to the center
+    references = 0
+    work = 0
+
+    while todo.size and references < max_references:
+        with localcontext() as ctx:
+            ctx.prec = digits
+            c_real = viewport.center_real + Decimal(ref_offset.real)
+            c_imag = viewport.center_imag + Decimal(ref_offset.imag)
+        orbit = reference_orbit(c_real, c_imag, mset.max_iterations, mset.escape_radius, digits)
+        references += 1
+
+        its, mags, glitched, n = perturb(
+            dc[todo] - ref_offset, orbit, mset.max_iterations, mset.escape_radius, glitch_tolerance
+        )
+        work += n
+        good = ~glitched
+        iterations[todo[good]] = its[good]
+        magnitude[todo[good]] = mags[good]
+
+        todo = todo[glitched]
+        if todo.size:
+            centroid = dc[todo].mean()
+            ref_offset = dc[todo][np.argmin(np.abs(dc[todo] - centroid))]
+
+    mset.work += work
+    shape = viewport.image.size[::-1]
+    field = EscapeField(
+        iterations.reshape(shape), magnitude.reshape(shape), mset.max_iterations, work=work
+    )
+    return field, {"references": references, "glitched": int(todo.size)}
+
+
+def paint_deep(
+    viewport: DeepViewport,
+    mset: MandelbrotSet,
+    palette: List[Tuple[int, int, int]],
+    max_references: int = 16,
+) -> Dict[str, int]:
+    """Deep-zoom version of mandelbrot.paint(); returns the stats dict."""
+    field, stats = compute_field_deep(viewport, mset, max_references)
+    paint_field(viewport, field, palette)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a deep Mandelbrot zoom by perturbation.")
+    parser.add_argument("--real", required=True, help="real part of the center, any number of digits")
+    parser.add_argument("--imag", required=True, help="imaginary part of the center")
+    parser.add_argument("--width", type=float, required=True, help="view width, e.g. 1e-40")
+    parser.add_argument("--size", type=parse_size, default=(800, 600))
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--palette", default="turbo")
+    parser.add_argument("--palette-size", type=int, default=512)
+    parser.add_argument("-o", "--output", default="mandelbrot_deep.png")
+    args = parser.parse_args(argv)
+
+    image = Image.new("RGB", args.size)
+    viewport = DeepViewport(image, Decimal(args.real), Decimal(args.imag), args.width)
+    mset = MandelbrotSet(max_iterations=args.iterations)
+
+    stats = paint_deep(viewport, mset, named_palette(args.palette, args.palette_size))
+    image.save(args.output, format="PNG")
+    print(f"Saved image to {args.output} ({stats['references']} references, "
+          f"{stats['glitched']} glitched pixels left)")
+
+
+if __name__ == "__main__":
+    main()
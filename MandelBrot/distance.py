@@ -0,0 +1,59 @@
+# distance.py
+#
+# Distance-estimation (DEM) helpers. With MandelbrotSet(distance_estimate=True)
+# every escaped point gets an estimate of its distance to the set's boundary,
+# so we know which pixels actually touch the boundary instead of guessing
+# from iteration counts. Thin filaments that fall between sample points
+# still show up, because their neighbours are measurably close to them.
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from mandelbrot import EscapeField, MandelbrotSet, Viewport, colorize, compute_field
+
+
+def _distance(field: EscapeField) -> np.ndarray:
+    if field.distance is None:
+        raise ValueError("field has no distance channel, use distance_estimate=True")
+    return field.distance
+
+
+def near_boundary(field: EscapeField, scale: float, max_distance: float = 1.0) -> np.ndarray:
+    """
+    True for escaped points estimated to be within max_distance pixels
+    (of size `scale`) of the boundary. Bounded points are always False.
+    """
+    return field.escaped & (_distance(field) < max_distance * scale)
+
+
+def boundary_shade(field: EscapeField, scale: float, thickness: float = 1.0) -> np.ndarray:
+    """
+    Brightness in [0, 1]: 0 inside the set and on the boundary, rising
+    to 1 at `thickness` pixels away from it.
+    """
+    shade = np.clip(_distance(field) / (thickness * scale), 0.0, 1.0)
+    return np.where(field.escaped, np.sqrt(shade), 0.0)
+
+
+def paint_distance(
+    viewport: Viewport,
+    mset: MandelbrotSet,
+    palette: Optional[List[Tuple[int, int, int]]] = None,
+    thickness: float = 1.0,
+    smooth: bool = True,
+):
+    """
+    Paint the viewport with the boundary drawn as a dark outline,
+    `thickness` pixels wide, however thin the filament. With a palette
+    the usual colors are darkened towards the boundary, otherwise the
+    image is white on black.
+    """
+    field = compute_field(viewport, mset)
+    shade = boundary_shade(field, viewport.scale, thickness)
+
+    if palette is None:
+        rgb = np.repeat((shade * 255)[..., np.newaxis], 3, axis=-1)
+    else:
+        rgb = colorize(field, palette, smooth) * shade[..., np.newaxis]
+    viewport.write_array(np.rint(rgb).astype(np.uint8))
@@ -0,0 +1,330 @@
+# explorer.py
+#
+# Interactive Mandelbrot explorer (pygame).
+#
+#   drag with the left mouse button   pan
+#   mouse wheel                       zoom in / out around the pointer
+#   + / -                             double / halve max_iterations
+#   r                                 back to the start view
+#   Esc or closing the window         quit
+#
+# All computing happens on a process pool; the UI loop only pastes
+# finished blocks into the frame and blits it, so it never waits for a
+# render. The view is cut into blocks that are refined coarse to fine
+# (one sample per 8x8 pixels, then 2x2, then every pixel). Pixels live on
+# a lattice fixed to the current zoom level, so panning just shifts the
+# frame and queues the blocks under the newly exposed strips; a zoom
+# starts a new lattice.
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Tuple
+import argparse
+import heapq
+import itertools
+import multiprocessing
+import os
+
+import numpy as np
+import pygame
+
+from mandelbrot import MandelbrotSet, colorize, named_palette, parse_size, pixel_coordinates
+
+
+STEPS = (8, 2, 1)       # sample spacing of each refinement pass, coarse first
+BLOCK = 128             # blocks are BLOCK x BLOCK pixels (a multiple of STEPS[0])
+ZOOM = 1.5              # zoom factor per wheel notch
+FPS = 60
+
+Box = Tuple[int, int, int, int]   # (left, upper, right, lower) in lattice pixels
+
+
+def render_block(anchor: complex, scale: float, box: Box, step: int, new: np.ndarray,
+                 mset: MandelbrotSet, palette: str, palette_size: int) -> np.ndarray:
+    """
+    Colors of the samples every `step` pixels of a block, counted from
+    its top-left corner, as an RGB array over that sample grid. Only the
+    samples marked in `new` are computed. Lattice pixel (x, y) is the
+    point anchor + (x - y*1j) * scale. Runs in a worker process.
+    """
+    left, upper, right, lower = box
+    xs = np.arange(left, right, step)
+    ys = np.arange(upper, lower, step)
+    c = pixel_coordinates(anchor, scale, (0, 0), xs[np.newaxis, :], ys[:, np.newaxis])
+    rgb = np.zeros((ys.size, xs.size, 3), dtype=np.uint8)
+    rgb[new] = colorize(mset.escape_field(c[new]), named_palette(palette, palette_size))
+    return rgb
+
+
+class Frame:
+    """
+    The pixels on screen and the bookkeeping to fill them in: a window
+    of size (w, h) onto a pixel lattice, the queue of block passes still
+    to do, and the ones running on the pool.
+
+    `level` holds, per pixel, the step of the pass that painted it (1 =
+    the pixel's own value, NOTHING = not painted since the last pan or
+    zoom). A pass only paints over coarser pixels and only computes
+    samples that are not exact yet, so passes may finish in any order
+    and blocks may be queued more than once.
+    """
+    NOTHING = 255
+
+    def __init__(self, size: Tuple[int, int], center: complex, width: float):
+        self.size = size
+        self.rgb = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        self.level = np.full((size[1], size[0]), self.NOTHING, dtype=np.uint8)
+        self.generation = 0
+        self.dirty = True
+        self._queue: List[tuple] = []
+        self._queued = set()        # blocks waiting for their first pass
+        self._running: Dict[Future, tuple] = {}
+        self._order = itertools.count()
+        self.reset(center, width / size[0])
+
+    @property
+    def center(self) -> complex:
+        w, h = self.size
+        return self.anchor + complex(self.origin[0] + w / 2, -(self.origin[1] + h / 2)) * self.scale
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue) + len(self._running)
+
+    def reset(self, center: complex, scale: float):
+        """Start a new lattice with pixel (0, 0) at the window's top-left."""
+        w, h = self.size
+        self.generation += 1
+        self.scale = scale
+        self.anchor = center - complex(w / 2, -h / 2) * scale
+        self.origin = (0, 0)
+        self.level[:] = self.NOTHING
+        for future in self._running:
+            future.cancel()
+        self._running.clear()
+        self._queue.clear()
+        self._queued.clear()
+        self._add((0, 0, w, h))
+
+    def _add(self, box: Box):
+        """
+        Queue the first pass of the blocks overlapping box. Blocks sit on
+        a fixed BLOCK grid, so every pass samples the same lattice points
+        whichever strip it was queued for.
+        """
+        left, upper, right, lower = box
+        for y in range(upper // BLOCK * BLOCK, lower, BLOCK):
+            for x in range(left // BLOCK * BLOCK, right, BLOCK):
+                block = (x, y, x + BLOCK, y + BLOCK)
+                if block not in self._queued:
+                    self._queued.add(block)
+                    heapq.heappush(self._queue, (0, next(self._order), block))
+
+    def _window(self, block: Box):
+        """Slices of the block (in block pixels) and of the window it overlaps."""
+        left, upper, right, lower = block
+        ox, oy = self.origin
+        w, h = self.size
+        x0, x1 = max(left, ox), min(right, ox + w)
+        y0, y1 = max(upper, oy), min(lower, oy + h)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        inside = (slice(y0 - upper, y1 - upper), slice(x0 - left, x1 - left))
+        window = (slice(y0 - oy, y1 - oy), slice(x0 - ox, x1 - ox))
+        return inside, window
+
+    def pan(self, dx: int, dy: int):
+        """Move the picture by (dx, dy) pixels, keeping what it already shows."""
+        if not (dx or dy):
+            return
+        w, h = self.size
+        src = (slice(max(0, -dy), min(h, h - dy)), slice(max(0, -dx), min(w, w - dx)))
+        dst = (slice(max(0, dy), min(h, h + dy)), slice(max(0, dx), min(w, w + dx)))
+        rgb, level = np.zeros_like(self.rgb), np.full_like(self.level, self.NOTHING)
+        rgb[dst], level[dst] = self.rgb[src], self.level[src]
+        self.rgb, self.level = rgb, level
+
+        ox, oy = self.origin[0] - dx, self.origin[1] - dy
+        self.origin = (ox, oy)
+        # Newly exposed strips: columns on one side, rows on the other
+        if dx > 0:
+            self._add((ox, oy, ox + min(dx, w), oy + h))
+        elif dx < 0:
+            self._add((ox + w + max(dx, -w), oy, ox + w, oy + h))
+        if dy > 0:
+            self._add((ox, oy, ox + w, oy + min(dy, h)))
+        elif dy < 0:
+            self._add((ox, oy + h + max(dy, -h), ox + w, oy + h))
+        self.dirty = True
+
+    def zoom(self, factor: float, x: int, y: int):
+        """Zoom by factor (> 1 is in) around window pixel (x, y)."""
+        w, h = self.size
+        point = self.anchor + complex(self.origin[0] + x, -(self.origin[1] + y)) * self.scale
+        scale = self.scale / factor
+
+        # Stretch the old picture as a preview until the new one arrives
+        xs = np.clip(np.rint(x + (np.arange(w) - x) / factor).astype(int), 0, w - 1)
+        ys = np.clip(np.rint(y + (np.arange(h) - y) / factor).astype(int), 0, h - 1)
+        self.rgb = self.rgb[ys][:, xs]
+
+        self.reset(point - complex(x - w / 2, -(y - h / 2)) * scale, scale)
+        self.dirty = True
+
+    def _samples(self, block: Box, step: int) -> np.ndarray:
+        """Samples of a pass that are in the window and not exact yet."""
+        n = BLOCK // step
+        new = np.zeros((n, n), dtype=bool)
+        overlap = self._window(block)
+        if overlap is not None:
+            inside, window = overlap
+            exact = np.ones((BLOCK, BLOCK), dtype=bool)
+            exact[inside] = self.level[window] == 1
+            new = ~exact[::step, ::step]
+        return new
+
+    def submit(self, executor, limit: int, mset: MandelbrotSet, palette: str, palette_size: int):
+        """Keep up to `limit` block passes running; off-screen ones are dropped."""
+        while self._queue and len(self._running) < limit:
+            rank, _, block = heapq.heappop(self._queue)
+            if rank == 0:
+                self._queued.discard(block)
+            if self._window(block) is None:
+                continue
+            new = self._samples(block, STEPS[rank])
+            if not new.any():
+                self._next(rank, block)
+                continue
+            future = executor.submit(
+                render_block, self.anchor, self.scale, block, STEPS[rank], new,
+                mset, palette, palette_size,
+            )
+            self._running[future] = (self.generation, rank, block, new)
+
+    def _next(self, rank: int, block: Box):
+        if rank + 1 < len(STEPS):
+            heapq.heappush(self._queue, (rank + 1, next(self._order), block))
+
+    def collect(self):
+        """Paste every finished pass into the frame and queue the next one."""
+        for future in [f for f in self._running if f.done()]:
+            generation, rank, block, new = self._running.pop(future)
+            if generation != self.generation or future.cancelled():
+                continue
+            self._paste(block, STEPS[rank], future.result(), new)
+            self._next(rank, block)
+
+    def _paste(self, block: Box, step: int, rgb: np.ndarray, new: np.ndarray):
+        overlap = self._window(block)
+        if overlap is None:
+            return
+        inside, window = overlap
+
+        # Each sample colors the step x step square below and right of
+        # it, where nothing finer is there yet; its own pixel is exact
+        pixels = rgb.repeat(step, axis=0).repeat(step, axis=1)[inside]
+        paint = new.repeat(step, axis=0).repeat(step, axis=1)[inside]
+        exact = np.zeros((BLOCK, BLOCK), dtype=bool)
+        exact[::step, ::step] = new
+        exact = exact[inside]
+
+        level = self.level[window]
+        paint &= level > step
+        self.rgb[window][paint] = pixels[paint]
+        level[paint] = step
+        level[exact] = 1
+        self.dirty = True
+
+
+class Explorer:
+    def __init__(self, size, center: complex, width: float, mset: MandelbrotSet,
+                 palette: str, palette_size: int, workers: int = None):
+        self.screen = pygame.display.set_mode(size)
+        self.clock = pygame.time.Clock()
+        self.start = (center, width)
+        self.mset = mset
+        self.palette, self.palette_size = palette, palette_size
+        # spawn: forked workers would inherit the display connection
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.limit = 2 * (workers or os.cpu_count())
+        self.frame = Frame(size, center, width)
+        self.dragging = False
+
+    def run(self):
+        self.playing = True
+        while self.playing:
+            self.clock.tick(FPS)
+            self.events()
+            self.frame.collect()
+            self.frame.submit(self.executor, self.limit, self.mset, self.palette, self.palette_size)
+            self.draw()
+        self.executor.shutdown(cancel_futures=True)
+        pygame.quit()
+
+    def draw(self):
+        if not self.frame.dirty:
+            return
+        pygame.surfarray.blit_array(self.screen, self.frame.rgb.swapaxes(0, 1))
+        pygame.display.flip()
+        self.frame.dirty = False
+
+        width = self.frame.scale * self.frame.size[0]
+        pygame.display.set_caption(
+            f"Mandelbrot {self.frame.center:.15g}  width {width:.3g}  "
+            f"iterations {self.mset.max_iterations}"
+            + (f"  ({self.frame.pending} blocks to go)" if self.frame.pending else "")
+        )
+
+    def restart(self):
+        self.frame.reset(self.frame.center, self.frame.scale)
+
+    def events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.playing = False
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.dragging = True
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                self.dragging = False
+            elif event.type == pygame.MOUSEMOTION and self.dragging:
+                self.frame.pan(*event.rel)
+            elif event.type == pygame.MOUSEWHEEL:
+                x, y = pygame.mouse.get_pos()
+                self.frame.zoom(ZOOM ** event.y, x, y)
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.playing = False
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    self.mset.max_iterations *= 2
+                    self.restart()
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.mset.max_iterations = max(10, self.mset.max_iterations // 2)
+                    self.restart()
+                elif event.key == pygame.K_r:
+                    center, width = self.start
+                    self.frame.reset(center, width / self.frame.size[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Explore the Mandelbrot set interactively.")
+    parser.add_argument("--center", type=complex, default=complex(-0.75, 0.0))
+    parser.add_argument("--width", type=float, default=3.5)
+    parser.add_argument("--size", type=parse_size, default=(1280, 720),
+                        help="window size, e.g. 1920x1080")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--palette", default="turbo")
+    parser.add_argument("--palette-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of render processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    mset = MandelbrotSet(max_iterations=args.iterations, periodicity_check=True)
+    Explorer(args.size, args.center, args.width, mset, args.palette, args.palette_size,
+             args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
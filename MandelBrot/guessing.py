@@ -0,0 +1,138 @@
+# guessing.py
+#
+# Mariani-Silver "solid guessing" renderer. The Mandelbrot set is
+# connected, so when every pixel on the border of a rectangle has the
+# same escape count, every pixel inside it has that count too. Only
+# rectangle borders are iterated; rectangles with a mixed border are
+# split into four and examined again.
+
+from typing import List, Tuple
+
+import numpy as np
+
+from mandelbrot import EscapeField, MandelbrotSet, Viewport, paint_field, pixel_coordinates
+
+
+def _border(box) -> Tuple[np.ndarray, np.ndarray]:
+    """(ys, xs) pixel coordinates along the edge of a box."""
+    left, upper, right, lower = box
+    xs = np.arange(left, right)
+    ys = np.arange(upper, lower)
+    return (
+        np.concatenate([np.full(xs.size, upper), np.full(xs.size, lower - 1), ys, ys]),
+        np.concatenate([xs, xs, np.full(ys.size, left), np.full(ys.size, right - 1)]),
+    )
+
+
+def _area(box) -> Tuple[np.ndarray, np.ndarray]:
+    """(ys, xs) pixel coordinates of every pixel in a box."""
+    left, upper, right, lower = box
+    ys, xs = np.mgrid[upper:lower, left:right]
+    return ys.ravel(), xs.ravel()
+
+
+def _split(box) -> List[Tuple[int, int, int, int]]:
+    """Four quarters of a box; neighbours share their middle row/column."""
+    left, upper, right, lower = box
+    mx = (left + right) // 2
+    my = (upper + lower) // 2
+    return [
+        (left, upper, mx + 1, my + 1),
+        (mx, upper, right, my + 1),
+        (left, my, mx + 1, lower),
+        (mx, my, right, lower),
+    ]
+
+
+def compute_field_guessed(
+    viewport: Viewport,
+    mset: MandelbrotSet,
+    min_size: int = 8,
+) -> Tuple[EscapeField, float]:
+    """
+    Compute the escape field by recursive rectangle subdivision.
+
+    Returns the field and the fraction of pixels that were actually
+    iterated. Rectangles are processed a whole level at a time so each
+    level is a single call into the vectorized kernel. Boxes no larger
+    than min_size pixels (and at least 2) on a side are computed in full.
+
+    Filled exterior regions take the mean border |z|, so smooth coloring
+    is approximate inside them; bounded regions are exact.
+    """
+    width, height = viewport.image.size
+
+    iterations = np.full((height, width), -1, dtype=np.int32)
+    magnitude = np.zeros((height, width), dtype=np.float64)
+    known = np.zeros((height, width), dtype=bool)
+    skipped = 0
+    work = 0
+    computed = 0
+
+    def compute(ys: np.ndarray, xs: np.ndarray):
+        nonlocal skipped, work, computed
+        flat = np.unique(ys * width + xs)
+        flat = flat[~known.flat[flat]]
+        if flat.size == 0:
+            return
+        ys, xs = np.divmod(flat, width)
+
+        c = pixel_coordinates(viewport.center, viewport.scale, viewport.image.size, xs, ys)
+
+        field = mset.escape_field(c)
+        iterations[ys, xs] = field.iterations
+        magnitude[ys, xs] = field.magnitude
+        known[ys, xs] = True
+        skipped += field.skipped
+        work += field.work
+        computed += flat.size
+
+    pending = [(0, 0, width, height)]
+    while pending:
+        small, large = [], []
+        for box in pending:
+            left, upper, right, lower = box
+            # Splitting a box 2 pixels across gives it back unchanged,
+            # and its border is all of it anyway
+            too_small = min(right - left, lower - upper) <= max(min_size, 2)
+            (small if too_small else large).append(box)
+
+        # One kernel call for all small boxes and all borders of this level
+        areas = [_area(box) for box in small]
+        borders = [_border(box) for box in large]
+        if areas or borders:
+            compute(
+                np.concatenate([ys for ys, _ in areas + borders]),
+                np.concatenate([xs for _, xs in areas + borders]),
+            )
+
+        pending = []
+        for box, (ys, xs) in zip(large, borders):
+            edge = iterations[ys, xs]
+            if np.all(edge == edge[0]):
+                # Uniform border: fill the inside without iterating it
+                left, upper, right, lower = box
+                inside = (slice(upper + 1, lower - 1), slice(left + 1, right - 1))
+                iterations[inside] = edge[0]
+                magnitude[inside] = magnitude[ys, xs].mean()
+                known[inside] = True
+            else:
+                pending.extend(_split(box))
+
+    field = EscapeField(iterations, magnitude, mset.max_iterations, skipped, work=work)
+    return field, computed / (width * height)
+
+
+def paint_guessed(
+    viewport: Viewport,
+    mset: MandelbrotSet,
+    palette: List[Tuple[int, int, int]],
+    min_size: int = 8,
+) -> float:
+    """
+    Solid-guessing version of mandelbrot.paint(). Returns the fraction
+    of pixels that were actually iterated.
+    """
+    field, fraction = compute_field_guessed(viewport, mset, min_size)
+    paint_field(viewport, field, palette)
+    return fraction
@@ -0,0 +1,131 @@
+# julia.py
+#
+# Julia sets on the Mandelbrot kernel: c stays fixed and the orbits start
+# from the pixels instead (MandelbrotSet.julia_field). Because escape_time
+# broadcasts c against z0, a whole sheet of small Julia sets, one per c
+# sampled from a Mandelbrot view, is computed in a few array passes.
+
+from typing import List, Tuple
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from mandelbrot import (
+    EscapeField, MandelbrotSet, Viewport, colorize, named_palette, paint_field, parse_size,
+)
+
+
+def paint_julia(
+    viewport: Viewport,
+    mset: MandelbrotSet,
+    c: complex,
+    palette: List[Tuple[int, int, int]],
+    smooth: bool = True,
+):
+    """Julia-set version of mandelbrot.paint(), for the parameter c."""
+    paint_field(viewport, mset.julia_field(c, viewport.complex_grid()), palette, smooth)
+
+
+def julia_thumbnails(
+    cs: np.ndarray,
+    mset: MandelbrotSet,
+    size: int = 64,
+    width: float = 4.0,
+    batch_size: int = 256,
+) -> EscapeField:
+    """
+    Compute one size x size Julia set, `width` wide and centered on 0,
+    for every c in cs. Returns a field of shape cs.shape + (size, size).
+
+    Thumbnails are computed batch_size at a time, each batch in a single
+    kernel call, which keeps the working arrays to a few tens of MB.
+    """
+    cs = np.asarray(cs, dtype=np.complex128)
+    flat = cs.ravel()
+    z0 = Viewport(Image.new("L", (size, size)), 0j, width).complex_grid()
+
+    iterations = np.empty((flat.size, size, size), dtype=np.int32)
+    magnitude = np.empty((flat.size, size, size), dtype=np.float64)
+    work = 0
+    for start in range(0, flat.size, batch_size):
+        batch = slice(start, start + batch_size)
+        field = mset.julia_field(flat[batch, np.newaxis, np.newaxis], z0)
+        iterations[batch] = field.iterations
+        magnitude[batch] = field.magnitude
+        work += field.work
+
+    shape = cs.shape + (size, size)
+    return EscapeField(
+        iterations.reshape(shape), magnitude.reshape(shape), mset.max_iterations, work=work
+    )
+
+
+def thumbnail_sheet(
+    viewport: Viewport,
+    mset: MandelbrotSet,
+    palette: List[Tuple[int, int, int]],
+    columns: int = 32,
+    rows: int = 32,
+    size: int = 64,
+    width: float = 4.0,
+    smooth: bool = True,
+) -> Image.Image:
+    """
+    Split the Mandelbrot view into columns x rows square cells and
+    return one image with, in each cell, the Julia set (`width` wide)
+    for the c at the cell's center. Only the viewport's center and width
+    are used; the sheet is (columns * size) x (rows * size) pixels.
+    """
+    cells = Viewport(Image.new("L", (columns, rows)), viewport.center, viewport.width)
+    # complex_grid gives the cells' top-left corners
+    half = cells.scale / 2
+    cs = cells.complex_grid() + complex(half, -half)
+
+    field = julia_thumbnails(cs, mset, size, width)
+    rgb = colorize(field, palette, smooth)
+    sheet = rgb.transpose(0, 2, 1, 3, 4).reshape(rows * size, columns * size, 3)
+    return Image.fromarray(np.ascontiguousarray(sheet))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render Julia sets.")
+    parser.add_argument("--c", type=complex,
+                        help="render the Julia set for this c, e.g. --c=-0.8+0.156j")
+    parser.add_argument("--center", type=complex, default=complex(-0.75, 0.0),
+                        help="without --c: Mandelbrot view to sample c from")
+    parser.add_argument("--width", type=float, default=3.5,
+                        help="width of the Mandelbrot view to sample c from")
+    parser.add_argument("--julia-width", type=float, default=4.0,
+                        help="width of each Julia view")
+    parser.add_argument("--size", type=parse_size, default=(800, 600),
+                        help="image size with --c, WIDTHxHEIGHT")
+    parser.add_argument("--grid", type=parse_size, default=(32, 32),
+                        help="without --c: thumbnails per row and column, COLSxROWS")
+    parser.add_argument("--thumb-size", type=int, default=64)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--palette", default="turbo")
+    parser.add_argument("--palette-size", type=int, default=512)
+    parser.add_argument("-o", "--output", default="julia.png")
+    args = parser.parse_args(argv)
+
+    mset = MandelbrotSet(max_iterations=args.iterations, periodicity_check=True)
+    palette = named_palette(args.palette, args.palette_size)
+
+    if args.c is not None:
+        image = Image.new("RGB", args.size)
+        viewport = Viewport(image, 0j, args.julia_width)
+        paint_julia(viewport, mset, args.c, palette)
+    else:
+        columns, rows = args.grid
+        viewport = Viewport(Image.new("L", args.grid), args.center, args.width)
+        image = thumbnail_sheet(
+            viewport, mset, palette, columns, rows, args.thumb_size, args.julia_width
+        )
+
+    image.save(args.output, format="PNG")
+    print(f"Saved image to {args.output} ({mset.work} iterations)")
+
+
+if __name__ == "__main__":
+    main()
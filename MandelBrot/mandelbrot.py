@@ -1,20 +1,388 @@
-from dataclasses import dataclass
-from typing import Tuple, List
+from dataclasses import dataclass, field
+from typing import Tuple, List, Optional
+import argparse
 import math
 
 from PIL import Image
 import numpy as np
-import matplotlib.pyplot as plt
+
+# Matplotlib (colormaps, the preview window) is imported lazily where it
+# is needed, so headless renders do not pay for it at startup.
+from palette import apply as apply_palette, colormap, named as named_palette
 
 
 # ==========================
 #  Mandelbrot core
 # ==========================
 
+@dataclass
+class EscapeField:
+    """
+    Raw escape-time data for a grid of points, independent of any palette.
+
+    iterations holds the iteration at which |z| first exceeded the escape
+    radius, or -1 for points that stayed bounded. magnitude holds |z| at
+    that moment (0 for bounded points).
+    """
+    iterations: np.ndarray
+    magnitude: np.ndarray
+    max_iterations: int
+    skipped: int = 0            # points proven interior without iterating
+    period: Optional[np.ndarray] = None     # cycle length found, 0 = none
+    distance: Optional[np.ndarray] = None   # exterior distance estimate, 0 inside
+    work: int = 0               # z -> z**2 + c updates actually performed
+    state: Optional["EscapeState"] = None   # see escape_time(keep_state=True)
+
+    @property
+    def escaped(self) -> np.ndarray:
+        return self.iterations >= 0
+
+    def __getitem__(self, key) -> "EscapeField":
+        """Slice every channel the same way, e.g. field[::2, ::2]."""
+        return EscapeField(
+            self.iterations[key],
+            self.magnitude[key],
+            self.max_iterations,
+            period=None if self.period is None else self.period[key],
+            distance=None if self.distance is None else self.distance[key],
+        )
+
+    def save(self, path):
+        """
+        Write the field, and its resumable state if any, to an .npz file.
+        """
+        arrays = {"iterations": self.iterations, "magnitude": self.magnitude}
+        if self.period is not None:
+            arrays["period"] = self.period
+        if self.distance is not None:
+            arrays["distance"] = self.distance
+        if self.state is not None:
+            arrays.update(
+                state_index=self.state.index, state_z=self.state.z,
+                state_c=self.state.c, state_julia=self.state.julia,
+            )
+            if self.state.dz is not None:
+                arrays["state_dz"] = self.state.dz
+        np.savez(
+            path, max_iterations=self.max_iterations, skipped=self.skipped, **arrays
+        )
+
+    @classmethod
+    def load(cls, path) -> "EscapeField":
+        """Read a field written by save()."""
+        with np.load(path) as data:
+            max_iterations = int(data["max_iterations"])
+            state = None
+            if "state_index" in data:
+                state = EscapeState(
+                    data["state_index"], data["state_z"], data["state_c"], max_iterations,
+                    data["state_dz"] if "state_dz" in data else None,
+                    bool(data["state_julia"]) if "state_julia" in data else False,
+                )
+            return cls(
+                data["iterations"], data["magnitude"], max_iterations,
+                int(data["skipped"]),
+                period=data["period"] if "period" in data else None,
+                distance=data["distance"] if "distance" in data else None,
+                state=state,
+            )
+
+    def escape_count(self) -> np.ndarray:
+        """Array version of MandelbrotSet.escape_count."""
+        return np.where(self.escaped, self.iterations, self.max_iterations)
+
+    def stability(self, smooth: bool = True) -> np.ndarray:
+        """Array version of MandelbrotSet.stability (same formula)."""
+        escaped = self.escaped
+        n = self.iterations[escaped].astype(np.float64)
+
+        if smooth:
+            mag = self.magnitude[escaped]
+            v = (n - np.log2(np.log2(mag))) / self.max_iterations
+        else:
+            v = (n - 1) / self.max_iterations
+
+        result = np.ones(self.iterations.shape, dtype=np.float64)
+        result[escaped] = np.clip(1.0 - v, 0.0, 1.0)
+        return result
+
+
+def in_main_bulbs(c):
+    """
+    True where c lies in the main cardioid or the period-2 bulb, both of
+    which are inside the set. Works on a single complex or an array.
+    """
+    x = c.real - 0.25
+    y2 = c.imag * c.imag
+    q = x * x + y2
+    in_cardioid = q * (q + x) <= 0.25 * y2
+    in_bulb = (c.real + 1) * (c.real + 1) + y2 <= 0.0625
+    return in_cardioid | in_bulb
+
+
+@dataclass
+class EscapeState:
+    """
+    Orbits that were still running when the kernel stopped: their flat
+    indices, current z and c, and how many iterations have been done
+    (plus the derivative when distances are being estimated, and whether
+    it is taken with respect to z0 as for a Julia set). Enough for a
+    later call with a higher max_iterations to carry on.
+    """
+    index: np.ndarray
+    z: np.ndarray
+    c: np.ndarray
+    iteration: int
+    dz: Optional[np.ndarray] = None
+    julia: bool = False
+
+
+def escape_time(
+    c: np.ndarray,
+    max_iterations: int,
+    escape_radius: float = 2.0,
+    compact_every: int = 16,
+    min_live_fraction: float = 0.5,
+    cardioid_check: bool = False,
+    periodicity_check: bool = False,
+    periodicity_epsilon: float = 1e-10,
+    distance_estimate: bool = False,
+    keep_state: bool = False,
+    z0: Optional[np.ndarray] = None,
+) -> EscapeField:
+    """
+    Iterate z -> z**2 + c for a whole array of points at once, starting
+    from z = 0, and record when (and how far out) each orbit escapes.
+
+    Julia mode: pass the starting points as z0. c and z0 are broadcast
+    against each other, so a single c gives one Julia set over the z0
+    grid, and c of shape (n, 1, 1) with z0 of shape (h, w) gives n of
+    them in the same pass.
+
+    Only the points that are still bounded are iterated. Escaped points
+    are parked at z = c = 0 (a fixed point, so they cannot overflow) and
+    dropped from the working arrays every `compact_every` iterations, or
+    sooner once fewer than `min_live_fraction` of them are still live.
+
+    With cardioid_check=True, points in the main cardioid or period-2
+    bulb are marked bounded up front and never iterated. This only holds
+    for orbits starting at 0, so it cannot be combined with z0.
+
+    With periodicity_check=True, z is compared against a value saved at
+    iterations 1, 2, 4, 8, ... (Brent's scheme). Once an orbit comes back
+    within periodicity_epsilon of it, the point is declared bounded and
+    the cycle length is stored in the field's period channel.
+
+    With distance_estimate=True, the derivative dz/dc is iterated along
+    with z (dz -> 2 * z * dz + 1) and the field gets a distance channel:
+    the exterior distance estimate |z| * ln|z| / |dz| at escape, which is
+    within a small factor of the true distance to the set's boundary.
+    In Julia mode the derivative is dz/dz0 instead (dz -> 2 * z * dz).
+
+    With keep_state=True, the orbits still running at the end are kept
+    in field.state so resume_escape_time can continue them later.
+    """
+    c = np.asarray(c, dtype=np.complex128)
+    julia = z0 is not None
+    if julia:
+        if cardioid_check:
+            raise ValueError("cardioid_check only applies to orbits starting at 0")
+        c, z0 = np.broadcast_arrays(c, np.asarray(z0, dtype=np.complex128))
+    field = EscapeField(
+        np.full(c.shape, -1, dtype=np.int32),
+        np.zeros(c.shape, dtype=np.float64),
+        max_iterations=0,
+    )
+
+    index = np.arange(c.size)
+    if cardioid_check:
+        inside = in_main_bulbs(c.ravel())
+        field.skipped = int(np.count_nonzero(inside))
+        index = index[~inside]
+    if julia:
+        z = z0.ravel()[index]
+        dz = np.ones(index.size, dtype=np.complex128) if distance_estimate else None
+    else:
+        z = np.zeros(index.size, dtype=np.complex128)
+        dz = z.copy() if distance_estimate else None
+    state = EscapeState(index, z, c.ravel()[index], 0, dz, julia)
+
+    return _iterate(
+        field, state, max_iterations, escape_radius, compact_every, min_live_fraction,
+        periodicity_check, periodicity_epsilon, distance_estimate, keep_state,
+    )
+
+
+def resume_escape_time(
+    field: EscapeField,
+    max_iterations: int,
+    escape_radius: float = 2.0,
+    compact_every: int = 16,
+    min_live_fraction: float = 0.5,
+    periodicity_check: bool = False,
+    periodicity_epsilon: float = 1e-10,
+    distance_estimate: bool = False,
+    keep_state: bool = False,
+) -> EscapeField:
+    """
+    Continue a field computed with keep_state=True up to a higher
+    max_iterations. Only the orbits that were still running are iterated,
+    and the escape data comes out the same as computing the field from
+    scratch. (Brent's schedule restarts, so a detected period may differ.)
+    """
+    if field.state is None:
+        raise ValueError("field has no saved state; compute it with keep_state=True")
+
+    if distance_estimate and field.state.dz is None:
+        raise ValueError("field was computed without distance_estimate=True")
+
+    resumed = EscapeField(
+        field.iterations.copy(), field.magnitude.copy(), field.max_iterations,
+        field.skipped,
+        period=None if field.period is None else field.period.copy(),
+        distance=None if field.distance is None else field.distance.copy(),
+    )
+    state = field.state
+    state = EscapeState(
+        state.index, state.z.copy(), state.c.copy(), state.iteration,
+        None if state.dz is None else state.dz.copy(), state.julia,
+    )
+
+    return _iterate(
+        resumed, state, max_iterations, escape_radius, compact_every, min_live_fraction,
+        periodicity_check, periodicity_epsilon, distance_estimate, keep_state,
+    )
+
+
+def _iterate(
+    field: EscapeField,
+    state: EscapeState,
+    max_iterations: int,
+    escape_radius: float,
+    compact_every: int,
+    min_live_fraction: float,
+    periodicity_check: bool,
+    periodicity_epsilon: float,
+    distance_estimate: bool,
+    keep_state: bool,
+) -> EscapeField:
+    """Kernel loop shared by escape_time and resume_escape_time."""
+    r2 = escape_radius * escape_radius
+    eps2 = periodicity_epsilon * periodicity_epsilon
+
+    iterations = field.iterations.reshape(-1)
+    magnitude = field.magnitude.reshape(-1)
+    if periodicity_check and field.period is None:
+        field.period = np.zeros(field.iterations.shape, dtype=np.int32)
+    period = field.period.reshape(-1) if periodicity_check else None
+    if distance_estimate and field.distance is None:
+        field.distance = np.zeros(field.iterations.shape, dtype=np.float64)
+    distance = field.distance.reshape(-1) if distance_estimate else None
+
+    # Working set: flat indices of the live points, their z and c, and
+    # dz/dc when estimating distances
+    index, z, c_live = state.index, state.z, state.c
+    dz = state.dz if distance_estimate else None
+    # dz/dc gains 1 per step; dz/dz0 (Julia mode) does not
+    dc = 0.0 if state.julia else 1.0
+    alive = np.ones(index.size, dtype=bool)
+    n_dead = 0
+    work = 0
+
+    # Periodicity check: the orbit value saved at iteration saved_at
+    saved = z.copy() if periodicity_check else None
+    saved_at = state.iteration
+    n = state.iteration
+
+    for n in range(state.iteration + 1, max_iterations + 1):
+        if index.size == 0:
+            break
+
+        if distance_estimate:
+            # Near the boundary dz can overflow; a zero distance is right there
+            with np.errstate(over="ignore", invalid="ignore"):
+                dz = 2 * z * dz + dc
+        z = z * z + c_live
+        mag2 = z.real * z.real + z.imag * z.imag
+        work += z.size
+
+        escaped = mag2 > r2
+        done = escaped
+        if escaped.any():
+            iterations[index[escaped]] = n
+            mag = np.sqrt(mag2[escaped])
+            magnitude[index[escaped]] = mag
+            if distance_estimate:
+                with np.errstate(over="ignore", invalid="ignore"):
+                    distance[index[escaped]] = np.nan_to_num(
+                        mag * np.log(mag) / np.abs(dz[escaped]), nan=0.0
+                    )
+
+        if periodicity_check:
+            gap = z - saved
+            cycled = (gap.real * gap.real + gap.imag * gap.imag < eps2) & alive & ~escaped
+            if cycled.any():
+                period[index[cycled]] = n - saved_at
+                done = escaped | cycled
+
+        n_done = np.count_nonzero(done)
+        if n_done:
+            z[done] = 0
+            c_live[done] = 0
+            if distance_estimate:
+                dz[done] = 0
+            alive &= ~done
+            n_dead += n_done
+
+        if n_dead and (
+            n % compact_every == 0
+            or (index.size - n_dead) < min_live_fraction * index.size
+        ):
+            index, z, c_live = index[alive], z[alive], c_live[alive]
+            if distance_estimate:
+                dz = dz[alive]
+            if periodicity_check:
+                saved = saved[alive]
+            alive = np.ones(index.size, dtype=bool)
+            n_dead = 0
+
+        # Brent: refresh the saved value at iterations 1, 2, 4, 8, ...
+        if periodicity_check and n == max(1, 2 * saved_at):
+            saved = z.copy()
+            saved_at = n
+
+    field.max_iterations = max_iterations
+    field.work = work
+    field.state = None
+    if keep_state:
+        field.state = EscapeState(
+            index[alive], z[alive], c_live[alive], max_iterations,
+            dz[alive] if distance_estimate else None, state.julia,
+        )
+    return field
+
+
 @dataclass
 class MandelbrotSet:
     max_iterations: int = 200
     escape_radius: float = 2.0
+    # Skip points in the main cardioid / period-2 bulb (known interior)
+    cardioid_check: bool = True
+    # Stop iterating once the orbit is found to cycle (Brent's method)
+    periodicity_check: bool = False
+    periodicity_epsilon: float = 1e-10
+    # Also track dz/dc and output an exterior distance estimate (arrays only)
+    distance_estimate: bool = False
+    # How many points the cardioid check has skipped so far
+    skipped: int = field(default=0, init=False, repr=False, compare=False)
+    # Iterations performed by the array methods so far
+    work: int = field(default=0, init=False, repr=False, compare=False)
+
+    def _known_interior(self, c: complex) -> bool:
+        if self.cardioid_check and in_main_bulbs(c):
+            self.skipped += 1
+            return True
+        return False
 
     def escape_count(self, c: complex) -> int:
         """
@@ -22,14 +390,20 @@ class MandelbrotSet:
         escapes beyond the escape radius. If it never escapes within
         max_iterations, return max_iterations.
         """
+        if self._known_interior(c):
+            return self.max_iterations
+
         z = 0 + 0j
         r2 = self.escape_radius * self.escape_radius
+        cycle = _CycleCheck(self)
 
         for n in range(self.max_iterations):
             # Check magnitude squared to avoid a sqrt
             if (z.real * z.real + z.imag * z.imag) > r2:
                 return n
             z = z * z + c
+            if cycle.found(z, n + 1):
+                break
 
         return self.max_iterations
 
@@ -42,8 +416,12 @@ class MandelbrotSet:
         If smooth=True, use a continuous coloring formula instead of
         coarse integer iteration counts.
         """
+        if self._known_interior(c):
+            return 1.0
+
         z = 0 + 0j
         r2 = self.escape_radius * self.escape_radius
+        cycle = _CycleCheck(self)
 
         for n in range(self.max_iterations):
             z = z * z + c
@@ -64,9 +442,92 @@ class MandelbrotSet:
                 # Convert to "stability": inside ≈ 1, outside ≈ 0
                 return max(0.0, min(1.0, 1.0 - v))
 
+            if cycle.found(z, n + 1):
+                break
+
         # Did not escape: treat as fully stable
         return 1.0
 
+    def escape_field(self, c: np.ndarray, keep_state: bool = False) -> EscapeField:
+        """
+        Run the vectorized escape-time kernel over an array of points.
+        With keep_state=True the result can later be passed to resume().
+        """
+        result = escape_time(
+            c, self.max_iterations, self.escape_radius,
+            cardioid_check=self.cardioid_check,
+            periodicity_check=self.periodicity_check,
+            periodicity_epsilon=self.periodicity_epsilon,
+            distance_estimate=self.distance_estimate,
+            keep_state=keep_state,
+        )
+        self.skipped += result.skipped
+        self.work += result.work
+        return result
+
+    def julia_field(self, c, z0: np.ndarray, keep_state: bool = False) -> EscapeField:
+        """
+        Julia-set version of escape_field: c is fixed (or broadcast, see
+        escape_time) and the orbits start from the points z0.
+        """
+        result = escape_time(
+            c, self.max_iterations, self.escape_radius,
+            periodicity_check=self.periodicity_check,
+            periodicity_epsilon=self.periodicity_epsilon,
+            distance_estimate=self.distance_estimate,
+            keep_state=keep_state,
+            z0=z0,
+        )
+        self.work += result.work
+        return result
+
+    def resume(self, field: EscapeField, keep_state: bool = True) -> EscapeField:
+        """
+        Raise a field computed with keep_state=True to the current
+        max_iterations, iterating only the points that had not escaped.
+        """
+        result = resume_escape_time(
+            field, self.max_iterations, self.escape_radius,
+            periodicity_check=self.periodicity_check,
+            periodicity_epsilon=self.periodicity_epsilon,
+            distance_estimate=self.distance_estimate,
+            keep_state=keep_state,
+        )
+        self.work += result.work
+        return result
+
+    def escape_count_array(self, c: np.ndarray) -> np.ndarray:
+        """Array version of escape_count: one result per element of c."""
+        return self.escape_field(c).escape_count()
+
+    def stability_array(self, c: np.ndarray, smooth: bool = True) -> np.ndarray:
+        """Array version of stability: one result per element of c."""
+        return self.escape_field(c).stability(smooth)
+
+
+class _CycleCheck:
+    """
+    Scalar version of the periodicity check in escape_time: remembers z
+    at iterations 1, 2, 4, 8, ... and reports when the orbit returns to it.
+    """
+
+    def __init__(self, mset: MandelbrotSet):
+        self.enabled = mset.periodicity_check
+        self.eps2 = mset.periodicity_epsilon * mset.periodicity_epsilon
+        self.saved = 0j
+        self.saved_at = 0
+
+    def found(self, z: complex, n: int) -> bool:
+        if not self.enabled:
+            return False
+        d = z - self.saved
+        if d.real * d.real + d.imag * d.imag < self.eps2:
+            return True
+        if n == max(1, 2 * self.saved_at):
+            self.saved = z
+            self.saved_at = n
+        return False
+
 
 # ==========================
 #  Viewport / Pixel helpers
@@ -99,11 +560,41 @@ class Viewport:
         """
         Complex coordinate of the top-left pixel.
         """
+        w, h = self.image.size
         return complex(
-            self.center.real - self.width / 2,
-            self.center.imag + self.height / 2
+            self.center.real - w / 2 * self.scale,
+            self.center.imag + h / 2 * self.scale
         )
 
+    def complex_grid(self, dtype=np.complex128, box=None) -> np.ndarray:
+        """
+        Return the complex coordinate of every pixel as a 2-D array of
+        shape (height, width), or only those inside box = (left, upper,
+        right, lower) in pixel coordinates.
+        """
+        return pixel_grid(self.center, self.scale, self.image.size, box, dtype)
+
+    def mirror_rows(self) -> np.ndarray:
+        """
+        For every pixel row, the row whose results it can reuse: itself,
+        or the row holding exactly its complex conjugates when the view
+        straddles the real axis (see compute_field).
+        """
+        _, h = self.image.size
+        rows = pixel_coordinates(self.center, self.scale, self.image.size, 0, np.arange(h))
+        return mirror_rows(rows.imag)
+
+    def write_array(self, rgb: np.ndarray):
+        """
+        Copy a (height, width, 3) uint8 array (or (height, width) for
+        single-band images) into the image in one step, instead of one
+        putpixel call per pixel.
+        """
+        rgb = np.ascontiguousarray(rgb, dtype=np.uint8)
+        # fromarray wraps the array buffer without copying; paste then
+        # copies it into the existing image so callers keep their handle.
+        self.image.paste(Image.fromarray(rgb))
+
     def __iter__(self):
         """Iterate over all pixels in the viewport as Pixel objects."""
         w, h = self.image.size
@@ -112,6 +603,73 @@ class Viewport:
                 yield Pixel(self, x, y)
 
 
+def pixel_coordinates(center: complex, scale: float, size, xs, ys, dtype=np.complex128) -> np.ndarray:
+    """
+    Complex coordinates of the pixels (xs, ys) of a size = (w, h) image
+    centered on `center`; xs and ys are broadcast against each other.
+    Same mapping as Pixel.to_complex.
+
+    Positions are measured from the center, (x - w/2, h/2 - y) pixels,
+    so a view centered on the real axis gets rows that are exact
+    conjugates of each other.
+    """
+    w, h = size
+    xs, ys = np.broadcast_arrays(xs, ys)
+    c = np.empty(xs.shape, dtype=dtype)
+    c.real = center.real + (xs - w / 2) * scale
+    c.imag = center.imag + (h / 2 - ys) * scale
+    return c
+
+
+def pixel_grid(center: complex, scale: float, size, box=None, dtype=np.complex128) -> np.ndarray:
+    """
+    Complex coordinates for the pixels inside box = (left, upper, right,
+    lower) of a size = (w, h) image, or all of them, as a 2-D array.
+    """
+    left, upper, right, lower = box or (0, 0) + tuple(size)
+    xs = np.arange(left, right)[np.newaxis, :]
+    ys = np.arange(upper, lower)[:, np.newaxis]
+    return pixel_coordinates(center, scale, size, xs, ys, dtype)
+
+
+def mirror_rows(imag: np.ndarray) -> np.ndarray:
+    """
+    Given the imaginary part of each row of a pixel grid (rows that share
+    their real parts), return for each row the index of the row to copy
+    its results from. A row below the real axis maps to the row above
+    whose imaginary part is exactly its negation, if there is one, since
+    conj(c) has the conjugate orbit: same escape count, |z|, period and
+    distance. All other rows map to themselves.
+    """
+    above = {}
+    for y, v in enumerate(imag.tolist()):
+        if v >= 0:
+            above.setdefault(v, y)
+
+    source = np.arange(imag.size)
+    for y, v in enumerate(imag.tolist()):
+        if v < 0 and -v in above:
+            source[y] = above[-v]
+    return source
+
+
+def count_known_interior(mset: MandelbrotSet, center: complex, scale: float, size, ys) -> int:
+    """
+    How many pixels of the rows ys of a size = (w, h) image the cardioid
+    check would skip, for counting rows that are copied, not iterated.
+    Rows are mapped a block at a time to keep memory down.
+    """
+    if not mset.cardioid_check:
+        return 0
+    xs = np.arange(size[0])[np.newaxis, :]
+    ys = np.asarray(ys)
+    total = 0
+    for start in range(0, ys.size, 256):
+        c = pixel_coordinates(center, scale, size, xs, ys[start:start + 256, np.newaxis])
+        total += int(np.count_nonzero(in_main_bulbs(c)))
+    return total
+
+
 @dataclass
 class Pixel:
     viewport: Viewport
@@ -130,13 +688,14 @@ class Pixel:
         """
         Map pixel (x, y) to a complex coordinate based on the viewport.
         """
-        offset = self.viewport.offset
+        center = self.viewport.center
         scale = self.viewport.scale
+        w, h = self.viewport.image.size
         # Note: y increases downward in image space, but imaginary axis
         # increases upward, so we subtract.
         return complex(
-            offset.real + self.x * scale,
-            offset.imag - self.y * scale
+            center.real + (self.x - w / 2) * scale,
+            center.imag + (h / 2 - self.y) * scale
         )
 
     def __complex__(self) -> complex:
@@ -147,24 +706,11 @@ class Pixel:
 #  Color utilities
 # ==========================
 
-def make_palette(colormap_name: str, size: int = 256) -> List[Tuple[int, int, int]]:
+def make_palette(colormap_name: str, size: int = 256) -> np.ndarray:
     """
-    Build an RGB palette (list of (r, g, b)) using a Matplotlib colormap.
+    Build an RGB palette ((size, 3) uint8 array) from a Matplotlib colormap.
     """
-    cmap = plt.get_cmap(colormap_name)
-    palette: List[Tuple[int, int, int]] = []
-
-    for i in range(size):
-        # value between 0 and 1
-        t = i / (size - 1)
-        r, g, b, _ = cmap(t)
-        palette.append((
-            int(r * 255),
-            int(g * 255),
-            int(b * 255),
-        ))
-
-    return palette
+    return colormap(colormap_name, size)
 
 
 def paint(viewport: Viewport, mset: MandelbrotSet, palette: List[Tuple[int, int, int]]):
@@ -172,57 +718,155 @@ def paint(viewport: Viewport, mset: MandelbrotSet, palette: List[Tuple[int, int,
     Render the Mandelbrot set into the given viewport using the supplied palette.
     The palette is indexed by stability value.
     """
-    n_colors = len(palette)
+    paint_field(viewport, compute_field(viewport, mset), palette)
 
-    for pixel in viewport:
-        c = complex(pixel)
-        s = mset.stability(c, smooth=True)   # 0..1
-        # Map stability to palette index
-        idx = int(s * (n_colors - 1))
-        pixel.color = palette[idx]
+
+def compute_field(viewport: Viewport, mset: MandelbrotSet) -> EscapeField:
+    """
+    Escape field of the whole viewport. When the view straddles the real
+    axis only the rows on one side (and any rows without an exact mirror
+    image) are iterated; the others are copied, so the result is
+    identical to iterating every row.
+    """
+    grid = viewport.complex_grid()
+    source = mirror_rows(grid[:, 0].imag)
+    rows = np.unique(source)
+    field = mset.escape_field(grid[rows])
+    if rows.size == source.size:
+        return field
+
+    mirrored = field[np.searchsorted(rows, source)]
+    copied = np.flatnonzero(source != np.arange(source.size))
+    # Copied rows had their bulb points skipped too, as far as the counter goes
+    extra = count_known_interior(mset, viewport.center, viewport.scale, viewport.image.size, copied)
+    mset.skipped += extra
+    mirrored.skipped, mirrored.work = field.skipped + extra, field.work
+    return mirrored
+
+
+def paint_field(
+    viewport: Viewport,
+    field: EscapeField,
+    palette: List[Tuple[int, int, int]],
+    smooth: bool = True,
+):
+    """
+    Color an already computed escape field into the viewport's image.
+    Keep the field around to try other palettes without re-iterating.
+    """
+    viewport.write_array(colorize(field, palette, smooth))
+
+
+def colorize(
+    field: EscapeField,
+    palette: List[Tuple[int, int, int]],
+    smooth: bool = True,
+) -> np.ndarray:
+    """
+    Map an escape field through the palette in one NumPy pass, returning
+    a uint8 RGB array of the field's shape.
+    """
+    s = field.stability(smooth)   # 0..1
+    # Map stability to palette index
+    return apply_palette(palette, s)
 
 
 # ==========================
 #  Main script
 # ==========================
 
-def main():
-    # Image parameters
-    width_px = 800
-    height_px = 600
+def parse_size(text: str) -> Tuple[int, int]:
+    """Parse an image size written as WIDTHxHEIGHT, e.g. 800x600."""
+    try:
+        width, height = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return width, height
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Render the Mandelbrot set to a PNG file.")
+    parser.add_argument("--center", type=complex, default=complex(-0.75, 0.0),
+                        help="center of the view, e.g. --center=-0.7435+0.1314j")
+    parser.add_argument("--width", type=float, default=3.5,
+                        help="width of the view in the complex plane")
+    parser.add_argument("--size", type=parse_size, default=(800, 600),
+                        help="image size in pixels, WIDTHxHEIGHT")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--escape-radius", type=float, default=2.0)
+    parser.add_argument("--palette", default="turbo",
+                        help='Matplotlib colormap name, or "hsb" for the HSB ramp')
+    parser.add_argument("--palette-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="render on this many processes (tiled mode when > 1)")
+    parser.add_argument("--antialias", metavar="PATTERN", choices=["grid2x2", "rgss", "grid3x3"],
+                        help="supersample edge pixels with this sample pattern")
+    parser.add_argument("--distance", action="store_true",
+                        help="shade by estimated distance to the boundary "
+                             "(with --antialias: supersample only near it)")
+    parser.add_argument("-o", "--output", default="mandelbrot_color.png")
+    parser.add_argument("--no-show", dest="show", action="store_false",
+                        help="only write the PNG (for headless machines)")
+    return parser.parse_args(argv)
+
+
+def show(image: Image.Image):
+    """Display an image in a Matplotlib window (imported only here)."""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 6))
+    plt.imshow(np.array(image))
+    plt.axis("off")
+    plt.title("Mandelbrot Set (colored)")
+    plt.show()
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
     # Create a blank RGB image (black)
-    image = Image.new("RGB", (width_px, height_px), (0, 0, 0))
+    image = Image.new("RGB", args.size, (0, 0, 0))
 
     # Define which part of the complex plane to view
-    # (this is a classic initial view)
-    center = complex(-0.75, 0.0)
-    view_width = 3.5
-
-    viewport = Viewport(image=image, center=center, width=view_width)
+    # (the defaults are the classic initial view)
+    viewport = Viewport(image=image, center=args.center, width=args.width)
 
     # Create Mandelbrot set object
-    mset = MandelbrotSet(max_iterations=300, escape_radius=2.0)
+    mset = MandelbrotSet(
+        max_iterations=args.iterations,
+        escape_radius=args.escape_radius,
+        distance_estimate=args.distance,
+    )
 
     # Build a nice color palette (try "turbo", "plasma", "twilight", etc.)
-    palette = make_palette("turbo", size=512)
+    palette = named_palette(args.palette, size=args.palette_size)
 
     # Render
     print("Rendering Mandelbrot set, please wait...")
-    paint(viewport, mset, palette)
+    if args.antialias:
+        from antialias import paint_antialiased
+        extra = paint_antialiased(
+            viewport, mset, palette, pattern=args.antialias,
+            max_distance=2.0 if args.distance else None,
+        )
+        print(f"Took {extra} extra samples on edge pixels")
+    elif args.distance:
+        from distance import paint_distance
+        paint_distance(viewport, mset, palette)
+    elif args.workers > 1:
+        from tiled import paint_tiled
+        paint_tiled(viewport, mset, palette, workers=args.workers)
+    else:
+        paint(viewport, mset, palette)
     print("Done!")
 
     # Save to file
-    output_file = "mandelbrot_color.png"
-    image.save(output_file, format="PNG")
-    print(f"Saved image to {output_file}")
+    image.save(args.output, format="PNG")
+    print(f"Saved image to {args.output}")
 
     # Optionally display using matplotlib
-    plt.figure(figsize=(8, 6))
-    plt.imshow(np.array(image))
-    plt.axis("off")
-    plt.title("Mandelbrot Set (colored)")
-    plt.show()
+    if args.show:
+        show(image)
 
 
 if __name__ == "__main__":
@@ -11,10 +11,20 @@ def complex_matrix(xmin, xmax, ymin, ymax, pixel_density):
 
 
 def is_stable(c, num_iterations):
-    z = 0
+    # Once |z| > 2 the orbit is bound to diverge, so escaped points are
+    # dropped from the working arrays instead of iterating them to inf/nan.
+    stable = np.ones(np.shape(c), dtype=bool)
+    index = np.arange(stable.size)
+    c_live = np.ravel(c)
+    z = np.zeros_like(c_live)
     for _ in range(num_iterations):
-        z = z**2 + c
-    return abs(z) <= 2
+        z = z**2 + c_live
+        escaped = abs(z) > 2
+        if escaped.any():
+            stable.flat[index[escaped]] = False
+            live = ~escaped
+            index, z, c_live = index[live], z[live], c_live[live]
+    return stable
 
 
 def get_members(c, num_iterations):
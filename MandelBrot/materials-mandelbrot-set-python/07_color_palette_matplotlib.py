@@ -1,14 +1,23 @@
 import matplotlib.cm
+import numpy as np
 from mandelbrot_03 import MandelbrotSet
 from PIL import Image
 from viewport import Viewport
 
 
+def compute(mandelbrot_set, viewport, smooth):
+    return mandelbrot_set.stability_array(viewport.complex_grid(), smooth)
+
+
+def colorize(stability, palette):
+    colors = np.array(palette, dtype=np.uint8)
+    index = np.minimum(stability * len(colors), len(colors) - 1).astype(int)
+    return colors[index % len(colors)]
+
+
 def paint(mandelbrot_set, viewport, palette, smooth):
-    for pixel in viewport:
-        stability = mandelbrot_set.stability(complex(pixel), smooth)
-        index = int(min(stability * len(palette), len(palette) - 1))
-        pixel.color = palette[index % len(palette)]
+    stability = compute(mandelbrot_set, viewport, smooth)
+    viewport.write_array(colorize(stability, palette))
 
 
 def denormalize(palette):
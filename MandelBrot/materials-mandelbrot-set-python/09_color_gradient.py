@@ -1,28 +1,34 @@
+import os
+import sys
+
 import numpy as np
 from mandelbrot_03 import MandelbrotSet
 from PIL import Image
-from scipy.interpolate import interp1d
 from viewport import Viewport
 
+# palette.py lives one level up; append so our viewport.py wins
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import palette as lut  # noqa: E402
 
-def paint(mandelbrot_set, viewport, palette, smooth):
-    for pixel in viewport:
-        stability = mandelbrot_set.stability(complex(pixel), smooth)
-        index = int(min(stability * len(palette), len(palette) - 1))
-        pixel.color = palette[index % len(palette)]
 
+def compute(mandelbrot_set, viewport, smooth):
+    return mandelbrot_set.stability_array(viewport.complex_grid(), smooth)
 
-def denormalize(palette):
-    return [
-        tuple(int(channel * 255) for channel in color) for color in palette
-    ]
 
+def colorize(stability, palette):
+    colors = np.array(palette, dtype=np.uint8)
+    index = np.minimum(stability * len(colors), len(colors) - 1).astype(int)
+    return colors[index % len(colors)]
 
-def make_gradient(colors, interpolation="linear"):
-    X = [i / (len(colors) - 1) for i in range(len(colors))]
-    Y = [[color[i] for color in colors] for i in range(3)]
-    channels = [interp1d(X, y, kind=interpolation) for y in Y]
-    return lambda x: [np.clip(channel(x), 0, 1) for channel in channels]
+
+def paint(mandelbrot_set, viewport, palette, smooth):
+    stability = compute(mandelbrot_set, viewport, smooth)
+    viewport.write_array(colorize(stability, palette))
+
+
+def make_gradient(colors, num_colors=256, interpolation="linear"):
+    # All num_colors samples in one interpolation call, cached by palette.py
+    return lut.gradient(tuple(colors), num_colors, interpolation)
 
 
 if __name__ == "__main__":
@@ -35,12 +41,7 @@ if __name__ == "__main__":
     red = (1, 0, 0)
 
     colors = [black, navy, blue, maroon, red, black]
-    gradient = make_gradient(colors, interpolation="cubic")
-
-    num_colors = 256
-    palette = denormalize(
-        [gradient(i / num_colors) for i in range(num_colors)]
-    )
+    palette = make_gradient(colors, num_colors=256, interpolation="cubic")
 
     mandelbrot_set = MandelbrotSet(max_iterations=20, escape_radius=1000)
     image = Image.new(mode="RGB", size=(512, 512))
@@ -1,15 +1,18 @@
-
+import os
+import sys
 
 from mandelbrot_03 import MandelbrotSet
 from PIL import Image
-from PIL.ImageColor import getrgb
 from viewport import Viewport
 
+# palette.py lives one level up; append so our viewport.py wins
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from palette import hsv_to_rgb  # noqa: E402
 
-def shading(hue_degrees: int, saturation: float, brightness: float):
-    return getrgb(
-        f"hsv({hue_degrees % 360},{saturation * 100}%,{brightness * 100}%)"
-    )
+
+def shading(hue_degrees, saturation, brightness):
+    # Whole arrays at once, same rounding as getrgb("hsv(...)")
+    return hsv_to_rgb(hue_degrees % 360 / 360, saturation, brightness)
 
 
 if __name__ == "__main__":
@@ -17,17 +20,14 @@ if __name__ == "__main__":
 
     mandelbrot_set = MandelbrotSet(max_iterations=25, escape_radius=7500)
     image = Image.new(mode="RGB", size=(1024, 1024))
-    for pixel in Viewport(image, center=-0.75, width=3.5):
-        stability = mandelbrot_set.stability(complex(pixel), smooth=True)
-        pixel.color = (
-            (0, 0, 0)
-            if stability == 1
-            else shading(
-                hue_degrees=int(stability * 360),
-                saturation=stability,
-                brightness=1,
-            )
-        )
+    viewport = Viewport(image, center=-0.75, width=3.5)
+    stability = mandelbrot_set.stability_array(viewport.complex_grid(), smooth=True)
+    rgb = shading(
+        hue_degrees=(stability * 360).astype(int),
+        saturation=stability,
+        brightness=1,
+    )
+    rgb[stability == 1] = (0, 0, 0)
+    viewport.write_array(rgb)
 
     image.show()
-
@@ -5,6 +5,8 @@ from __future__ import annotations  # Union type syntax
 from dataclasses import dataclass
 from math import log
 
+import numpy as np
+
 
 @dataclass
 class MandelbrotSet:
@@ -27,3 +29,25 @@ class MandelbrotSet:
                     return iteration + 1 - log(log(abs(z))) / log(2)
                 return iteration
         return self.max_iterations
+
+    def stability_array(self, c, smooth=False, clamp=True) -> np.ndarray:
+        value = self.escape_count_array(c, smooth) / self.max_iterations
+        return np.clip(value, 0.0, 1.0) if clamp else value
+
+    def escape_count_array(self, c, smooth=False) -> np.ndarray:
+        c = np.asarray(c, dtype=complex)
+        z = np.zeros_like(c)
+        counts = np.full(c.shape, float(self.max_iterations))
+        live = np.ones(c.shape, dtype=bool)
+        with np.errstate(over="ignore", invalid="ignore"):
+            for iteration in range(self.max_iterations):
+                z = z**2 + c
+                escaped = live & (np.abs(z) > self.escape_radius)
+                if smooth:
+                    counts[escaped] = (
+                        iteration + 1 - np.log(np.log(np.abs(z[escaped]))) / log(2)
+                    )
+                else:
+                    counts[escaped] = iteration
+                live &= ~escaped
+        return counts if smooth else counts.astype(int)
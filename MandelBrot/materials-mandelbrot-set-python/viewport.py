@@ -2,6 +2,7 @@
 
 from dataclasses import dataclass
 
+import numpy as np
 from PIL import Image
 
 
@@ -23,6 +24,18 @@ class Viewport:
     def scale(self):
         return self.width / self.image.width
 
+    def complex_grid(self, dtype=np.complex128):
+        re = self.offset.real + np.arange(self.image.width) * self.scale
+        im = self.offset.imag - np.arange(self.image.height) * self.scale
+        grid = np.empty((self.image.height, self.image.width), dtype=dtype)
+        grid.real = re[np.newaxis, :]
+        grid.imag = im[:, np.newaxis]
+        return grid
+
+    def write_array(self, rgb):
+        # fromarray wraps the buffer as-is; paste copies it in one step
+        self.image.paste(Image.fromarray(np.ascontiguousarray(rgb, dtype=np.uint8)))
+
     def __iter__(self):
         for y in range(self.image.height):
             for x in range(self.image.width):
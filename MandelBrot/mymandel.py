@@ -40,8 +40,9 @@
 # played with iterations and escape radius.
 
 from PIL import Image
-from PIL.ImageColor import getrgb
 from viewport import Viewport  
+from mandelbrot import escape_time
+import palette
 import math
 
 
@@ -51,6 +52,7 @@ class MandelbrotSet:
     """
     def __init__(self, max_iterations: int, escape_radius: float):
         self.max_iterations = max_iterations
+        self.escape_radius = escape_radius
         # Use squared radius so we avoid taking square roots in the loop
         self.escape_radius_squared = escape_radius * escape_radius
 
@@ -72,15 +74,25 @@ class MandelbrotSet:
         # If we never escaped, treat it as fully stable (inside the set)
         return 1.0
 
+    def stability_array(self, c, smooth: bool = True):
+        """
+        Same as stability(), but for a whole NumPy array of points at once.
+        """
+        field = escape_time(c, self.max_iterations, self.escape_radius)
+        # escape_time counts iterations from 1, stability() counts from 0
+        values = (field.iterations - 1) / self.max_iterations
+        values[~field.escaped] = 1.0
+        return values
+
 
 def shading(hue_degrees: int, saturation: float, brightness: float):
     """
     Turn hue, saturation, and brightness values into an RGB color.
-    Uses an HSV string like 'hsv(120,50%,80%)' and converts it to (R, G, B).
+    Same result as PIL's getrgb('hsv(...)'), without building a string.
     """
-    return getrgb(
-        f"hsv({hue_degrees % 360},{saturation * 100}%,{brightness * 100}%)"
-    )
+    return tuple(int(channel) for channel in palette.hsv_to_rgb(
+        (hue_degrees % 360) / 360, saturation, brightness
+    ))
 
 
 if __name__ == "__main__":
@@ -94,22 +106,17 @@ if __name__ == "__main__":
 
     # Viewport maps each image pixel to a complex number (x + yi)
     # center and width control what part of the Mandelbrot set we see
-    for pixel in Viewport(image, center=-0.75, width=3.5):
-        # Convert pixel's position to a complex number and measure its stability
-        stability = mandelbrot_set.stability(complex(pixel), smooth=True)
-
-        # If stability == 1, the point is considered inside the set -> color it black
-        # Otherwise, use the stability value to pick a color with the shading function
-        pixel.color = (
-            (0, 0, 0)
-            if stability == 1
-            else shading(
-                hue_degrees=int(stability * 360),
-                saturation=stability,
-                brightness=1,
-            )
-        )
+    viewport = Viewport(image, center=-0.75, width=3.5)
+
+    # Measure the stability of every pixel at once
+    stability = mandelbrot_set.stability_array(viewport.complex_grid(), smooth=True)
+
+    # If stability == 1, the point is considered inside the set -> color it black
+    # Otherwise, use the stability value to pick a color from the HSB ramp
+    # (hue = stability * 360, saturation = stability, brightness = 1)
+    viewport.write_array(
+        palette.apply(palette.hsv_ramp(), stability, inside=(0, 0, 0))
+    )
 
     # Display the generated Mandelbrot image
     image.show()
-
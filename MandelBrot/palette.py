@@ -0,0 +1,111 @@
+# palette.py
+#
+# Color lookup tables (LUTs) for the Mandelbrot renderers. Every palette
+# is a read-only (N, 3) uint8 NumPy array, built once per set of
+# parameters and cached, and applied to a whole stability array with a
+# single fancy-index instead of one color lookup per pixel.
+
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+Color = Tuple[float, float, float]
+
+
+def _freeze(lut: np.ndarray) -> np.ndarray:
+    # LUTs are shared between callers through the cache
+    lut.flags.writeable = False
+    return lut
+
+
+@lru_cache(maxsize=None)
+def colormap(name: str, size: int = 256) -> np.ndarray:
+    """
+    LUT sampled from a Matplotlib colormap (e.g. "turbo", "twilight").
+    Matplotlib is only imported when this is first called.
+    """
+    from matplotlib import colormaps
+
+    t = np.arange(size) / (size - 1)
+    rgba = colormaps[name](t)
+    return _freeze((rgba[:, :3] * 255).astype(np.uint8))
+
+
+@lru_cache(maxsize=None)
+def gradient(colors: Tuple[Color, ...], size: int = 256, interpolation: str = "linear") -> np.ndarray:
+    """
+    LUT interpolated between evenly spaced (r, g, b) colors in [0, 1].
+    "linear" uses NumPy only; other kinds ("cubic", ...) use SciPy.
+    """
+    x = np.linspace(0, 1, len(colors))
+    t = np.arange(size) / size
+    y = np.asarray(colors, dtype=np.float64)
+
+    if interpolation == "linear":
+        rgb = np.stack([np.interp(t, x, y[:, i]) for i in range(3)], axis=-1)
+    else:
+        from scipy.interpolate import interp1d
+
+        rgb = interp1d(x, y, kind=interpolation, axis=0)(t)
+
+    return _freeze((np.clip(rgb, 0, 1) * 255).astype(np.uint8))
+
+
+def hsv_to_rgb(hue: np.ndarray, saturation: np.ndarray, brightness: np.ndarray) -> np.ndarray:
+    """
+    Vectorized colorsys.hsv_to_rgb, with all inputs in [0, 1] and the
+    result rounded to uint8 the same way as PIL.ImageColor.getrgb.
+    """
+    h, s, v = np.broadcast_arrays(
+        np.asarray(hue, dtype=np.float64),
+        np.asarray(saturation, dtype=np.float64),
+        np.asarray(brightness, dtype=np.float64),
+    )
+    i = np.floor(h * 6.0)
+    f = h * 6.0 - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i.astype(np.intp) % 6
+
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    rgb = np.stack([r, g, b], axis=-1)
+    return (rgb * 255 + 0.5).astype(np.uint8)
+
+
+@lru_cache(maxsize=None)
+def hsv_ramp(size: int = 361, brightness: float = 1.0) -> np.ndarray:
+    """
+    LUT for the HSB shading used by mymandel.py: entry i stands for
+    stability s = i / (size - 1) and gets hue int(s * 360) degrees and
+    saturation s.
+    """
+    s = np.arange(size) / (size - 1)
+    hue = (s * 360).astype(int) % 360 / 360.0
+    return _freeze(hsv_to_rgb(hue, s, brightness))
+
+
+def named(name: str, size: int = 256) -> np.ndarray:
+    """
+    LUT by name: "hsb" for hsv_ramp, anything else is a Matplotlib colormap.
+    """
+    if name == "hsb":
+        return hsv_ramp(size)
+    return colormap(name, size)
+
+
+def apply(lut: np.ndarray, stability: np.ndarray, inside: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    Color a stability array (values in [0, 1]) with a LUT. If `inside`
+    is given, points with stability exactly 1 get that color instead.
+    """
+    lut = np.asarray(lut, dtype=np.uint8)
+    idx = (stability * (len(lut) - 1)).astype(np.intp)
+    rgb = lut[idx]
+    if inside is not None:
+        rgb[stability == 1] = inside
+    return rgb
@@ -0,0 +1,54 @@
+# progressive.py
+#
+# Coarse-to-fine preview renderer. Each pass computes a finer grid of
+# sample points and yields a displayable image; samples computed in a
+# coarser pass are kept and never iterated again.
+
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from mandelbrot import EscapeField, MandelbrotSet, Viewport, colorize
+
+
+def render_progressive(
+    viewport: Viewport,
+    mset: MandelbrotSet,
+    palette: List[Tuple[int, int, int]],
+    steps: Sequence[int] = (4, 2, 1),
+) -> Iterator[Image.Image]:
+    """
+    Render the viewport in passes, sampling every steps[i]-th pixel in
+    each direction (the default gives 1/16, 1/4 and full resolution).
+
+    After each pass the viewport's image is updated, with coarse samples
+    drawn as blocks, and yielded. It is the same image object every time,
+    so copy it if you need to keep an earlier pass. Stop iterating the
+    generator to stop rendering early.
+    """
+    width, height = viewport.image.size
+    grid = viewport.complex_grid()
+
+    field = EscapeField(
+        np.full((height, width), -1, dtype=np.int32),
+        np.zeros((height, width), dtype=np.float64),
+        mset.max_iterations,
+    )
+    known = np.zeros((height, width), dtype=bool)
+
+    for step in steps:
+        sample = (slice(None, None, step), slice(None, None, step))
+        todo = ~known[sample]
+
+        # Only the samples no coarser pass has computed yet
+        result = mset.escape_field(grid[sample][todo])
+        field.iterations[sample][todo] = result.iterations
+        field.magnitude[sample][todo] = result.magnitude
+        known[sample] = True
+
+        rgb = colorize(field[sample], palette)
+        if step > 1:
+            rgb = rgb.repeat(step, axis=0).repeat(step, axis=1)[:height, :width]
+        viewport.write_array(rgb)
+        yield viewport.image
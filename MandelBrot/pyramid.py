@@ -0,0 +1,282 @@
+# pyramid.py
+#
+# Tile pyramid for zoomable maps: every zoom level of a view cut into
+# 256x256 PNG tiles, in XYZ ({z}/{x}/{y}.png) or Deep Zoom (.dzi) layout.
+#
+#   python pyramid.py --center=-0.75+0j --width 3 --depth 6 -o tiles
+#
+# Level z splits the root view into 2**z x 2**z tiles. Tiles are rendered
+# on a process pool, one level at a time, and each one carries the same
+# parameter hash as batch.py outputs, so a rebuild skips tiles that are
+# up to date. Escape fields go into a FieldCache, by default one large
+# enough for every tile: after a palette change the tiles are only
+# recolored.
+#
+# Children of tiles that need no more iterating are not iterated either:
+#   interior  every pixel bounded; the children are filled with the
+#             inside color (like the solid regions of guessing.py)
+#   exterior  every pixel escaped and estimated (distance_estimate) to be
+#             more than a tile width from the boundary, where the escape
+#             potential is smooth; the children interpolate the parent
+#
+# Interpolated tiles are close to, not equal to, a full render: building
+# the default view to depth 4, they differed from paint() by up to 3/255
+# per channel. That comes from the bilinear interpolation, not from the
+# float32 field cache; tiles recolored from the cache match exactly.
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import argparse
+import os
+import time
+
+import numpy as np
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from batch import HASH_KEY, _mset_fields, is_current, job_hash, normalize
+from cache import FieldCache
+from mandelbrot import EscapeField, MandelbrotSet, Viewport, colorize, compute_field, named_palette
+
+
+TILE_SIZE = 256
+
+# One FieldCache per worker process and cache, so its running size total
+# is kept from tile to tile
+_caches: Dict[Tuple[str, int], FieldCache] = {}
+
+# PNG text chunk with the tile's classification, read back on rebuilds
+STATUS_KEY = "mandelbrot-tile"
+INTERIOR, EXTERIOR, MIXED = "interior", "exterior", "mixed"
+
+
+def tile_path(output: str, layout: str, z: int, x: int, y: int) -> str:
+    """Where tile (x, y) of zoom level z goes."""
+    if layout == "dzi":
+        # Deep Zoom level 8 is the 256-pixel image, i.e. our level 0
+        return os.path.join(output + "_files", str(z + 8), f"{x}_{y}.png")
+    return os.path.join(output, str(z), str(x), f"{y}.png")
+
+
+def tile_view(center: complex, width: float, z: int, x: int, y: int) -> Tuple[complex, float]:
+    """Center and width of tile (x, y) of level z of a square root view."""
+    size = width / 2 ** z
+    return center + complex(-width / 2 + (x + 0.5) * size, width / 2 - (y + 0.5) * size), size
+
+
+def classify(field: EscapeField, width: float) -> str:
+    if not field.escaped.any():
+        return INTERIOR
+    if field.escaped.all() and field.distance is not None and field.distance.min() > width:
+        return EXTERIOR
+    return MIXED
+
+
+def _interpolate(parent: EscapeField, quadrant: Tuple[int, int]) -> EscapeField:
+    """
+    Field of the child tile in `quadrant` (column, row) of an exterior
+    parent, by bilinear interpolation of the smooth iteration count
+    k - log2(log2|z|) and of the distance estimate.
+    """
+    n = parent.iterations.shape[0]
+    qx, qy = quadrant
+    # Child pixel i sits at parent pixel q * n/2 + i/2
+    at = np.arange(n) / 2
+    u = np.minimum(qx * n // 2 + at, n - 1)
+    v = np.minimum(qy * n // 2 + at, n - 1)
+    u0, v0 = np.minimum(u.astype(int), n - 2), np.minimum(v.astype(int), n - 2)
+    fu, fv = (u - u0)[np.newaxis, :], (v - v0)[:, np.newaxis]
+
+    def lerp(a):
+        a = np.asarray(a, dtype=np.float64)
+        top = a[v0][:, u0] * (1 - fu) + a[v0][:, u0 + 1] * fu
+        bottom = a[v0 + 1][:, u0] * (1 - fu) + a[v0 + 1][:, u0 + 1] * fu
+        return top * (1 - fv) + bottom * fv
+
+    nu = lerp(parent.iterations - np.log2(np.log2(parent.magnitude)))
+    iterations = np.maximum(np.ceil(nu), 1).astype(np.int32)
+    # |z| that gives back nu: k - log2(log2|z|) = nu
+    magnitude = 2.0 ** (2.0 ** (iterations - nu))
+    # Every pixel escaped, so no cycles were found
+    period = None if parent.period is None else np.zeros((n, n), dtype=np.int32)
+    return EscapeField(
+        iterations, magnitude, parent.max_iterations, period=period, distance=lerp(parent.distance)
+    )
+
+
+def field_bytes(mset: MandelbrotSet) -> int:
+    """Size of one tile's entry in the FieldCache."""
+    channels = 2 + mset.periodicity_check + mset.distance_estimate
+    return channels * 4 * TILE_SIZE * TILE_SIZE + 4096    # float32, plus the header
+
+
+def render_tile(args) -> Dict[str, object]:
+    """Render (or recolor) one tile; runs in a worker process."""
+    job, parent, cache_dir, cache_bytes = args
+    start = time.perf_counter()
+
+    size = TILE_SIZE
+    viewport = Viewport(Image.new("RGB", (size, size)), complex(job["center"]), job["width"])
+    mset = MandelbrotSet(**{name: job[name] for name in _mset_fields()})
+    cache = _caches.get((cache_dir, cache_bytes))
+    if cache is None:
+        cache = _caches[cache_dir, cache_bytes] = FieldCache(cache_dir, cache_bytes)
+
+    field = cache.get(viewport, mset)
+    how = "recolored"
+    if field is None and parent is not None and parent["status"] == INTERIOR:
+        field = EscapeField(
+            np.full((size, size), -1, dtype=np.int32), np.zeros((size, size)), mset.max_iterations
+        )
+        how = "filled"
+    if field is None and parent is not None and parent["status"] == EXTERIOR:
+        parent_view = Viewport(viewport.image, complex(parent["center"]), parent["width"])
+        parent_field = cache.get(parent_view, mset)
+        if parent_field is not None:
+            field = _interpolate(parent_field, parent["quadrant"])
+            cache.put(viewport, mset, field)
+            how = "interpolated"
+    if field is None:
+        field = compute_field(viewport, mset)
+        cache.put(viewport, mset, field)
+        how = "rendered"
+
+    status = classify(field, viewport.width)
+    viewport.write_array(colorize(field, named_palette(job["palette"], job["palette_size"])))
+
+    info = PngInfo()
+    info.add_text(HASH_KEY, job_hash(job))
+    info.add_text(STATUS_KEY, status)
+    os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+    viewport.image.save(job["output"], format="PNG", pnginfo=info)
+
+    return {"status": status, "how": how, "seconds": time.perf_counter() - start,
+            "iterations": mset.work}
+
+
+def _read_status(path: str) -> str:
+    with Image.open(path) as image:
+        return image.info.get(STATUS_KEY, MIXED)
+
+
+def build_pyramid(
+    viewport: Viewport,
+    depth: int,
+    output: str,
+    mset: MandelbrotSet,
+    palette: str = "turbo",
+    palette_size: int = 512,
+    layout: str = "xyz",
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    force: bool = False,
+    cache_bytes: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Write levels 0..depth of the square view `viewport.width` wide
+    around viewport.center (the image size is not used). Returns how
+    many tiles were rendered, recolored, filled, interpolated or found
+    up to date. mset should have distance_estimate=True for exterior
+    tiles to be recognised.
+
+    The field cache may hold cache_bytes; by default enough for every
+    tile of the pyramid, so that a rebuild never iterates again.
+    """
+    cache_dir = cache_dir or os.path.join(output + "_files" if layout == "dzi" else output, ".fields")
+    if cache_bytes is None:
+        tiles = (4 ** (depth + 1) - 1) // 3
+        cache_bytes = tiles * field_bytes(mset)
+    settings = {name: getattr(mset, name) for name in _mset_fields()}
+    counts = {"rendered": 0, "recolored": 0, "filled": 0, "interpolated": 0, "up to date": 0}
+
+    status: Dict[Tuple[int, int], str] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for z in range(depth + 1):
+            tasks, keys, parents = [], [], status
+            status = {}
+            for y in range(2 ** z):
+                for x in range(2 ** z):
+                    center, width = tile_view(viewport.center, viewport.width, z, x, y)
+                    job = normalize(dict(
+                        settings, output=tile_path(output, layout, z, x, y), center=center,
+                        width=width, size=f"{TILE_SIZE}x{TILE_SIZE}", palette=palette,
+                        palette_size=palette_size,
+                    ))
+                    if not force and is_current(job):
+                        status[x, y] = _read_status(job["output"])
+                        counts["up to date"] += 1
+                        continue
+
+                    parent = None
+                    if z > 0:
+                        parent_center, parent_width = tile_view(
+                            viewport.center, viewport.width, z - 1, x // 2, y // 2
+                        )
+                        parent = {"status": parents[x // 2, y // 2], "center": parent_center,
+                                  "width": parent_width, "quadrant": (x % 2, y % 2)}
+                    tasks.append((job, parent, cache_dir, cache_bytes))
+                    keys.append((x, y))
+
+            for key, result in zip(keys, executor.map(render_tile, tasks, chunksize=4)):
+                status[key] = result["status"]
+                counts[result["how"]] += 1
+            print(f"level {z}: {len(tasks)} of {4 ** z} tiles updated")
+
+    if layout == "dzi":
+        _write_dzi(output, depth)
+    return counts
+
+
+def _write_dzi(output: str, depth: int):
+    """Deep Zoom descriptor, and levels 0..7 shrunk from the level-8 tile."""
+    full = TILE_SIZE * 2 ** depth
+    with open(output + ".dzi", "w") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+            f'Format="png" Overlap="0" TileSize="{TILE_SIZE}">\n'
+            f'  <Size Width="{full}" Height="{full}"/>\n'
+            "</Image>\n"
+        )
+
+    with Image.open(tile_path(output, "dzi", 0, 0, 0)) as top:
+        for level in range(8):
+            path = os.path.join(output + "_files", str(level), "0_0.png")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            top.resize((2 ** level, 2 ** level), Image.LANCZOS).save(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a zoomable tile pyramid.")
+    parser.add_argument("--center", type=complex, default=complex(-0.75, 0.0))
+    parser.add_argument("--width", type=float, default=3.0,
+                        help="width (and height) of the level-0 tile")
+    parser.add_argument("--depth", type=int, default=5, help="deepest zoom level")
+    parser.add_argument("--layout", choices=["xyz", "dzi"], default="xyz")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--palette", default="turbo")
+    parser.add_argument("--palette-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of processes (default: one per CPU)")
+    parser.add_argument("--cache", help="escape field cache (default: inside the output)")
+    parser.add_argument("--cache-mb", type=int, default=None,
+                        help="size limit of the field cache (default: enough for every tile)")
+    parser.add_argument("--force", action="store_true", help="redo tiles even if up to date")
+    parser.add_argument("-o", "--output", default="tiles",
+                        help="output directory (xyz) or name of the .dzi (dzi)")
+    args = parser.parse_args(argv)
+
+    viewport = Viewport(Image.new("RGB", (TILE_SIZE, TILE_SIZE)), args.center, args.width)
+    mset = MandelbrotSet(max_iterations=args.iterations, distance_estimate=True)
+    start = time.perf_counter()
+    counts = build_pyramid(
+        viewport, args.depth, args.output, mset, args.palette, args.palette_size,
+        args.layout, args.workers, args.cache, args.force,
+        None if args.cache_mb is None else args.cache_mb << 20,
+    )
+    summary = ", ".join(f"{n} {how}" for how, n in counts.items() if n)
+    print(f"{summary} in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# strips.py
+#
+# Streaming renderer for images too big to hold in memory (print renders
+# of 40000x40000 pixels and up). The image is computed in horizontal
+# bands, and every band is written out before the next one starts:
+# either straight into a PNG that is encoded as it goes, or into a
+# memory-mapped .npy file. Peak memory depends on the band size only.
+#
+#   python strips.py --size 40000x40000 --iterations 1000 -o print.png
+#
+# There is no Pillow image and no Viewport here: a Viewport needs a
+# full-size image to know its size, which is exactly what we avoid.
+
+from typing import Callable, List, Tuple
+import argparse
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from mandelbrot import (
+    MandelbrotSet, colorize, count_known_interior, mirror_rows, named_palette, parse_size,
+    pixel_coordinates,
+)
+
+
+# Rough working memory per pixel of a band: the complex grid, the field
+# channels, the kernel's working arrays and temporaries, the RGB band and
+# the PNG encoder's filtered copy of it
+BYTES_PER_PIXEL = 160
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def parse_bytes(text: str) -> int:
+    """Parse a byte count with an optional K, M or G suffix, e.g. 512M."""
+    units = {"k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+    text = text.strip().lower().rstrip("b")
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a size like 512M, got {text!r}")
+
+
+def png_header(width: int, height: int) -> bytes:
+    """IHDR data: 8 bits per channel, color type 2 (RGB), no interlacing."""
+    return struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+
+
+def write_chunk(f, kind: bytes, data: bytes):
+    """Write one PNG chunk: length, type, data and CRC."""
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind + data)
+    f.write(struct.pack(">I", zlib.crc32(kind + data)))
+
+
+def sub_filter(rgb: np.ndarray) -> bytes:
+    """
+    PNG scanlines of an (h, w, 3) uint8 array with the Sub filter: each
+    byte minus the byte one pixel to the left.
+    """
+    data = rgb.reshape(len(rgb), -1)
+    filtered = np.empty((len(data), data.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 0] = 1
+    filtered[:, 1:4] = data[:, :3]
+    np.subtract(data[:, 3:], data[:, :-3], out=filtered[:, 4:])
+    return filtered.tobytes()
+
+
+def band_rows(width: int, memory: int, bytes_per_pixel: int = BYTES_PER_PIXEL) -> int:
+    """Rows per band so a band's working memory stays within `memory` bytes."""
+    return max(1, memory // (width * bytes_per_pixel))
+
+
+class PNGWriter:
+    """
+    Write an RGB PNG one band of rows at a time. Rows are Sub-filtered
+    and fed through a single zlib stream, so the memory needed does not
+    depend on the image height.
+    """
+
+    def __init__(self, path: str, width: int, height: int, level: int = 6):
+        self.width, self.height = width, height
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(level)
+        self._file = open(path, "wb")
+        self._file.write(PNG_SIGNATURE)
+        write_chunk(self._file, b"IHDR", png_header(width, height))
+
+    def write_rows(self, y: int, rgb: np.ndarray):
+        """Append rows; they have to come in order, starting at row y."""
+        if y != self.rows_written:
+            raise ValueError(f"PNG rows must be written in order, expected row {self.rows_written}")
+        compressed = self._compressor.compress(sub_filter(rgb))
+        if compressed:
+            write_chunk(self._file, b"IDAT", compressed)
+        self.rows_written += len(rgb)
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"only {self.rows_written} of {self.height} rows were written")
+        write_chunk(self._file, b"IDAT", self._compressor.flush())
+        write_chunk(self._file, b"IEND", b"")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        if kind is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+class NpyWriter:
+    """
+    A (height, width, 3) uint8 .npy file written and read back band by
+    band. Each access maps only the rows it needs and unmaps them again,
+    so finished rows do not stay resident. Load the result with
+    np.load(path, mmap_mode="r").
+    """
+
+    def __init__(self, path: str, width: int, height: int):
+        self.path, self.width, self.height = path, width, height
+        with open(path, "wb") as f:
+            np.lib.format.write_array_header_1_0(
+                f, {"descr": "|u1", "fortran_order": False, "shape": (height, width, 3)}
+            )
+            self._header = f.tell()
+            f.truncate(self._header + height * width * 3)
+
+    def _rows(self, start: int, stop: int, mode: str) -> np.memmap:
+        return np.memmap(
+            self.path, dtype=np.uint8, mode=mode, shape=(stop - start, self.width, 3),
+            offset=self._header + start * self.width * 3,
+        )
+
+    def write_rows(self, y: int, rgb: np.ndarray):
+        rows = self._rows(y, y + len(rgb), "r+")
+        rows[:] = rgb
+        rows.flush()
+        del rows
+
+    def read_rows(self, ys: np.ndarray) -> np.ndarray:
+        """Copy of the given (already written) rows."""
+        rows = self._rows(ys.min(), ys.max() + 1, "r")
+        result = np.array(rows[ys - ys.min()])
+        del rows
+        return result
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        self.close()
+
+
+def render_strips(
+    center: complex,
+    width: float,
+    size: Tuple[int, int],
+    mset: MandelbrotSet,
+    palette: List[Tuple[int, int, int]],
+    writer,
+    rows_per_band: int = 256,
+    smooth: bool = True,
+    progress: Callable[[int, int], None] = None,
+):
+    """
+    Render a size = (w, h) view `width` wide around `center` band by
+    band into `writer` (a PNGWriter or NpyWriter), calling
+    progress(rows_done, h) after each band.
+
+    With a writer that can read rows back (NpyWriter), rows that mirror
+    earlier rows across the real axis are copied instead of iterated,
+    as in mandelbrot.compute_field.
+    """
+    w, h = size
+    scale = width / w
+    xs = np.arange(w)[np.newaxis, :]
+
+    if hasattr(writer, "read_rows"):
+        source = mirror_rows(pixel_coordinates(center, scale, size, 0, np.arange(h)).imag)
+    else:
+        source = np.arange(h)
+
+    for top in range(0, h, rows_per_band):
+        bottom = min(top + rows_per_band, h)
+        wanted = source[top:bottom]
+
+        # Rows whose source is in this band are computed now, the others
+        # were written by an earlier band
+        here = wanted >= top
+        rows = np.unique(wanted[here])
+        field = mset.escape_field(pixel_coordinates(center, scale, size, xs, rows[:, np.newaxis]))
+
+        rgb = np.empty((bottom - top, w, 3), dtype=np.uint8)
+        rgb[here] = colorize(field, palette, smooth)[np.searchsorted(rows, wanted[here])]
+        if not here.all():
+            rgb[~here] = writer.read_rows(wanted[~here])
+        # Mirrored rows were copied, not iterated; count their skips
+        copied = top + np.flatnonzero(wanted != np.arange(top, bottom))
+        mset.skipped += count_known_interior(mset, center, scale, size, copied)
+        writer.write_rows(top, rgb)
+
+        if progress is not None:
+            progress(bottom, h)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a very large image in bands.")
+    parser.add_argument("--center", type=complex, default=complex(-0.75, 0.0))
+    parser.add_argument("--width", type=float, default=3.5)
+    parser.add_argument("--size", type=parse_size, default=(20000, 15000))
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--palette", default="turbo")
+    parser.add_argument("--palette-size", type=int, default=512)
+    parser.add_argument("--memory", type=parse_bytes, default=parse_bytes("256M"),
+                        help="working memory for one band, e.g. 1G (default 256M)")
+    parser.add_argument("--bytes-per-pixel", type=int, default=BYTES_PER_PIXEL,
+                        help="memory one band pixel costs, used to size the bands")
+    parser.add_argument("-o", "--output", default="mandelbrot_large.png",
+                        help="a .png (encoded while rendering) or a .npy (memory-mapped)")
+    args = parser.parse_args(argv)
+
+    w, h = args.size
+    rows = band_rows(w, args.memory, args.bytes_per_pixel)
+    mset = MandelbrotSet(max_iterations=args.iterations)
+    palette = named_palette(args.palette, args.palette_size)
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done}/{total} rows ({time.perf_counter() - start:.0f} s)", end="", flush=True)
+
+    writer_class = NpyWriter if args.output.endswith(".npy") else PNGWriter
+    print(f"Rendering {w}x{h} in bands of {rows} rows")
+    with writer_class(args.output, w, h) as writer:
+        render_strips(args.center, args.width, args.size, mset, palette, writer, rows,
+                      progress=progress)
+    print(f"\nSaved image to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# test_mandelbrot.py
+#
+# Regression checks for the equivalences the renderers rely on: every
+# fast path has to give exactly what the plain one gives. Small grids
+# only, so the whole module runs in a few seconds.
+#
+#   python -m pytest test_mandelbrot.py
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from cache import FieldCache
+from guessing import compute_field_guessed
+from mandelbrot import MandelbrotSet, Viewport, compute_field, named_palette, paint
+from progressive import render_progressive
+from strips import NpyWriter, PNGWriter, render_strips
+from tiled import paint_tiled
+
+
+SIZE = (48, 36)
+PALETTE = named_palette("turbo", 256)
+
+# One view straddling the real axis (mirrored rows) and one that does not
+VIEWS = [(complex(-0.75, 0.0), 3.5), (complex(-0.745, 0.113), 0.02)]
+
+
+def reference(center: complex, width: float, mset: MandelbrotSet) -> np.ndarray:
+    viewport = Viewport(Image.new("RGB", SIZE), center, width)
+    paint(viewport, mset, PALETTE)
+    return np.asarray(viewport.image)
+
+
+@pytest.mark.parametrize("periodicity_check", [False, True])
+def test_array_matches_scalar(periodicity_check):
+    mset = MandelbrotSet(max_iterations=100, periodicity_check=periodicity_check)
+    viewport = Viewport(Image.new("RGB", (24, 18)), complex(-0.75, 0.1), 3.0)
+    grid = viewport.complex_grid()
+
+    counts = [[mset.escape_count(c) for c in row] for row in grid]
+    np.testing.assert_array_equal(mset.escape_count_array(grid), counts)
+
+    for smooth in (True, False):
+        stability = [[mset.stability(c, smooth) for c in row] for row in grid]
+        np.testing.assert_allclose(mset.stability_array(grid, smooth), stability, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("distance_estimate", [False, True])
+def test_resume_matches_fresh_render(distance_estimate):
+    grid = Viewport(Image.new("RGB", SIZE), complex(-0.745, 0.113), 0.02).complex_grid()
+    low = MandelbrotSet(max_iterations=50, distance_estimate=distance_estimate)
+    high = MandelbrotSet(max_iterations=400, distance_estimate=distance_estimate)
+
+    resumed = high.resume(low.escape_field(grid, keep_state=True))
+    fresh = high.escape_field(grid)
+    np.testing.assert_array_equal(resumed.iterations, fresh.iterations)
+    np.testing.assert_array_equal(resumed.magnitude, fresh.magnitude)
+    if distance_estimate:
+        np.testing.assert_array_equal(resumed.distance, fresh.distance)
+
+
+@pytest.mark.parametrize("periodicity_check", [False, True])
+def test_mirrored_rows_match_full_render(periodicity_check):
+    mset = MandelbrotSet(
+        max_iterations=200, periodicity_check=periodicity_check, distance_estimate=True
+    )
+    # Even and odd heights put the real axis on a row or between rows
+    for size in [(40, 30), (40, 31)]:
+        viewport = Viewport(Image.new("RGB", size), complex(-0.75, 0.0), 3.0)
+        assert (viewport.mirror_rows() != np.arange(size[1])).any()
+
+        mirrored = compute_field(viewport, mset)
+        full = mset.escape_field(viewport.complex_grid())
+        for channel in ("iterations", "magnitude", "period", "distance"):
+            np.testing.assert_array_equal(getattr(mirrored, channel), getattr(full, channel))
+        # Copied rows count as skipped as much as iterated ones
+        assert mirrored.skipped == full.skipped
+
+
+@pytest.mark.parametrize("periodicity_check", [False, True])
+@pytest.mark.parametrize("distance_estimate", [False, True])
+def test_cache_round_trip(tmp_path, periodicity_check, distance_estimate):
+    mset = MandelbrotSet(
+        max_iterations=200, periodicity_check=periodicity_check, distance_estimate=distance_estimate
+    )
+    viewport = Viewport(Image.new("RGB", SIZE), complex(-0.75, 0.0), 3.0)
+    field = compute_field(viewport, mset)
+    cache = FieldCache(str(tmp_path))
+    cache.put(viewport, mset, field)
+
+    cached = cache.get(viewport, mset)
+    for channel in ("iterations", "magnitude", "period", "distance"):
+        expected = getattr(field, channel)
+        if expected is None:
+            assert getattr(cached, channel) is None
+        else:
+            np.testing.assert_array_equal(getattr(cached, channel), expected.astype(np.float32))
+
+    # A field without the channels the set computes is refused
+    other = MandelbrotSet(
+        max_iterations=200, periodicity_check=not periodicity_check, distance_estimate=distance_estimate
+    )
+    with pytest.raises(ValueError):
+        cache.put(viewport, other, field)
+
+
+@pytest.mark.parametrize("min_size", [0, 1, 2, 3])
+def test_guessing_small_boxes(min_size):
+    # Boxes too narrow to split are computed in full instead of re-queued
+    viewport = Viewport(Image.new("RGB", SIZE), complex(-0.75, 0.1), 3.0)
+    field, fraction = compute_field_guessed(viewport, MandelbrotSet(max_iterations=100), min_size)
+    assert 0 < fraction <= 1
+    full = MandelbrotSet(max_iterations=100).escape_field(viewport.complex_grid())
+    np.testing.assert_array_equal(field.iterations, full.iterations)
+
+
+@pytest.mark.parametrize("center, width", VIEWS)
+def test_tiled_matches_paint(center, width):
+    viewport = Viewport(Image.new("RGB", SIZE), center, width)
+    paint_tiled(viewport, MandelbrotSet(max_iterations=200), PALETTE, workers=2, tile_size=16)
+    np.testing.assert_array_equal(
+        np.asarray(viewport.image), reference(center, width, MandelbrotSet(max_iterations=200))
+    )
+
+
+@pytest.mark.parametrize("center, width", VIEWS)
+def test_progressive_matches_paint(center, width):
+    viewport = Viewport(Image.new("RGB", SIZE), center, width)
+    for image in render_progressive(viewport, MandelbrotSet(max_iterations=200), PALETTE):
+        pass
+    np.testing.assert_array_equal(
+        np.asarray(image), reference(center, width, MandelbrotSet(max_iterations=200))
+    )
+
+
+@pytest.mark.parametrize("center, width", VIEWS)
+@pytest.mark.parametrize("writer_class, suffix", [(PNGWriter, ".png"), (NpyWriter, ".npy")])
+def test_strips_match_paint(tmp_path, center, width, writer_class, suffix):
+    path = str(tmp_path / ("strips" + suffix))
+    with writer_class(path, *SIZE) as writer:
+        render_strips(center, width, SIZE, MandelbrotSet(max_iterations=200), PALETTE, writer,
+                      rows_per_band=7)
+
+    result = np.load(path) if suffix == ".npy" else np.asarray(Image.open(path))
+    np.testing.assert_array_equal(result, reference(center, width, MandelbrotSet(max_iterations=200)))
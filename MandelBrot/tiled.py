@@ -0,0 +1,137 @@
+# tiled.py
+#
+# Multi-core renderer: the viewport is cut into small tiles which are
+# handed out to a process pool one at a time. Workers write their escape
+# data straight into shared memory, so no pixel data is pickled back.
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+import os
+
+import numpy as np
+
+from mandelbrot import (
+    EscapeField, MandelbrotSet, Viewport, count_known_interior, paint_field, pixel_grid,
+)
+
+
+# Shared output arrays, attached once per worker process
+_shared = {}
+
+
+def _channels(mset: MandelbrotSet) -> Dict[str, type]:
+    """EscapeField arrays the workers have to fill in, with their dtypes."""
+    channels = {"iterations": np.int32, "magnitude": np.float64}
+    if mset.periodicity_check:
+        channels["period"] = np.int32
+    if mset.distance_estimate:
+        channels["distance"] = np.float64
+    return channels
+
+
+def _attach(names: Dict[str, str], channels: Dict[str, type], shape: Tuple[int, int]):
+    """Pool initializer: map the shared output buffers into this worker."""
+    for channel, dtype in channels.items():
+        shm = shared_memory.SharedMemory(name=names[channel])
+        _shared[channel] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+
+def _render_tile(job) -> Tuple[int, int]:
+    """Compute one tile and write it into the shared output arrays."""
+    center, scale, size, box, mset = job
+    left, upper, right, lower = box
+
+    field = mset.escape_field(pixel_grid(center, scale, size, box))
+    for channel, (_, array) in _shared.items():
+        array[upper:lower, left:right] = getattr(field, channel)
+    return field.skipped, field.work
+
+
+def tiles(width: int, height: int, tile_size: int) -> List[Tuple[int, int, int, int]]:
+    """Split a width x height image into (left, upper, right, lower) boxes."""
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in range(0, height, tile_size)
+        for x in range(0, width, tile_size)
+    ]
+
+
+def compute_field_tiled(
+    viewport: Viewport,
+    mset: MandelbrotSet,
+    workers: int = None,
+    tile_size: int = 64,
+) -> EscapeField:
+    """
+    Compute the escape field of the whole viewport on several cores.
+
+    Tiles are small and submitted individually, so an idle worker always
+    picks up the next one. This keeps all cores busy even though tiles
+    near the set cost far more than tiles that escape right away.
+
+    As in mandelbrot.compute_field, rows that mirror others across the
+    real axis are not rendered but copied afterwards.
+    """
+    workers = workers or os.cpu_count()
+    width, height = viewport.image.size
+    shape = (height, width)
+    channels = _channels(mset)
+
+    # Only the band of rows that are not copies of others
+    source = viewport.mirror_rows()
+    top, bottom = source.min(), source.max() + 1
+
+    blocks = {
+        channel: shared_memory.SharedMemory(
+            create=True, size=np.dtype(dtype).itemsize * width * height
+        )
+        for channel, dtype in channels.items()
+    }
+    try:
+        jobs = [
+            (viewport.center, viewport.scale, viewport.image.size,
+             (left, upper + top, right, lower + top), mset)
+            for left, upper, right, lower in tiles(width, bottom - top, tile_size)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach,
+            initargs=({k: shm.name for k, shm in blocks.items()}, channels, shape),
+        ) as executor:
+            counts = list(executor.map(_render_tile, jobs, chunksize=1))
+
+        # Copy out of shared memory so the blocks can be released
+        arrays = {
+            channel: np.ndarray(shape, dtype=dtype, buffer=blocks[channel].buf)[source]
+            for channel, dtype in channels.items()
+        }
+    finally:
+        for shm in blocks.values():
+            shm.close()
+            shm.unlink()
+
+    # Workers update their own copies of mset; fold their counts back in
+    # Rows outside the band were copied, not iterated; count their skips
+    copied = np.flatnonzero((np.arange(height) < top) | (np.arange(height) >= bottom))
+    skipped = sum(skipped for skipped, _ in counts) + count_known_interior(
+        mset, viewport.center, viewport.scale, viewport.image.size, copied
+    )
+    work = sum(work for _, work in counts)
+    mset.skipped += skipped
+    mset.work += work
+    return EscapeField(
+        max_iterations=mset.max_iterations, skipped=skipped, work=work, **arrays
+    )
+
+
+def paint_tiled(
+    viewport: Viewport,
+    mset: MandelbrotSet,
+    palette: List[Tuple[int, int, int]],
+    workers: int = None,
+    tile_size: int = 64,
+):
+    """Multi-core version of mandelbrot.paint()."""
+    field = compute_field_tiled(viewport, mset, workers, tile_size)
+    paint_field(viewport, field, palette)
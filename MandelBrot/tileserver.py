@@ -0,0 +1,228 @@
+# tileserver.py
+#
+# Localhost HTTP server rendering map tiles on demand:
+#
+#   python tileserver.py --port 8000
+#   GET /{z}/{x}/{y}.png     256x256 tile, same layout as pyramid.py (XYZ)
+#   GET /stats               counters as JSON
+#
+# Tiles are rendered on a process pool and the encoded PNGs kept in an
+# in-memory LRU. Requests for a tile that is already being rendered wait
+# for that render instead of starting another. When a client hangs up
+# (a map viewer aborts the requests of tiles that scrolled out of view),
+# its render is dropped, unless other clients are still waiting for it.
+# One request per connection keeps the hang-up easy to see.
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import re
+
+from PIL import Image
+
+from mandelbrot import MandelbrotSet, Viewport, colorize, compute_field, named_palette
+from pyramid import TILE_SIZE, tile_view
+
+
+TILE_PATH = re.compile(r"^/(\d+)/(\d+)/(\d+)\.png$")
+MAX_ZOOM = 40     # beyond this float64 runs out of precision anyway
+
+
+def render_png(center: complex, width: float, mset: MandelbrotSet, palette: str, palette_size: int) -> bytes:
+    """Render one tile and encode it; runs in a worker process."""
+    viewport = Viewport(Image.new("RGB", (TILE_SIZE, TILE_SIZE)), center, width)
+    viewport.write_array(colorize(compute_field(viewport, mset), named_palette(palette, palette_size)))
+    buffer = io.BytesIO()
+    viewport.image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TileServer:
+    """
+    Tiles of the square view `width` wide around `center`. At most
+    cache_bytes of encoded PNGs are kept, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        center: complex,
+        width: float,
+        mset: MandelbrotSet,
+        palette: str = "turbo",
+        palette_size: int = 512,
+        workers: int = None,
+        cache_bytes: int = 256 << 20,
+    ):
+        self.center, self.width, self.mset = center, width, mset
+        self.palette, self.palette_size = palette, palette_size
+        self.cache_bytes = cache_bytes
+        # Workers are started on demand; forked ones would inherit open
+        # client sockets and keep those connections from closing
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._cache: "OrderedDict[Tuple[int, int, int], bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        # Renders in flight: their executor future, its asyncio wrapper
+        # and how many requests wait on it
+        self._pending: Dict[Tuple[int, int, int], list] = {}
+        self.stats = {"requests": 0, "hits": 0, "coalesced": 0, "renders": 0, "dropped": 0}
+
+    def _remember(self, key: Tuple[int, int, int], png: bytes):
+        self._cache[key] = png
+        self._cached_bytes += len(png)
+        while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self._cached_bytes -= len(old)
+
+    def _finished(self, key: Tuple[int, int, int], future: asyncio.Future):
+        if self._pending.get(key, [None])[0] is future:
+            del self._pending[key]
+        if not future.cancelled() and future.exception() is None:
+            self._remember(key, future.result())
+
+    async def tile(self, z: int, x: int, y: int) -> bytes:
+        """The PNG of a tile, from the LRU, a render in flight or a new render."""
+        key = (z, x, y)
+        self.stats["requests"] += 1
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._cache[key]
+
+        entry = self._pending.get(key)
+        if entry is None:
+            center, width = tile_view(self.center, self.width, z, x, y)
+            job = self._executor.submit(
+                render_png, center, width, self.mset, self.palette, self.palette_size
+            )
+            future = asyncio.wrap_future(job)
+            future.add_done_callback(lambda f: self._finished(key, f))
+            entry = self._pending[key] = [future, job, 0]
+            self.stats["renders"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        future, job = entry[0], entry[1]
+        entry[2] += 1
+        try:
+            # shield: one waiter giving up must not cancel the others' render
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Last one waiting: drop the render if no worker has started
+            # it yet; one already running finishes and is cached. A
+            # request arriving from now on has to start a new render.
+            if entry[2] == 1 and job.cancel():
+                self.stats["dropped"] += 1
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+            raise
+        finally:
+            entry[2] -= 1
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP request on a new connection."""
+        try:
+            request = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()).strip():
+                pass    # headers are not needed
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            return
+
+        if len(request) < 2 or request[0] != "GET":
+            await self._respond(writer, 405, b"only GET is supported\n")
+            return
+        path = request[1].split("?")[0]
+        if path == "/stats":
+            await self._respond(writer, 200, json.dumps(self.stats).encode(), "application/json")
+            return
+        match = TILE_PATH.match(path)
+        z, x, y = map(int, match.groups()) if match else (0, -1, -1)
+        if not match or z > MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            await self._respond(writer, 404, b"no such tile\n")
+            return
+
+        # Render while watching the connection: EOF means the client gave up
+        render = asyncio.ensure_future(self.tile(z, x, y))
+        hangup = asyncio.ensure_future(reader.read(1))
+        await asyncio.wait({render, hangup}, return_when=asyncio.FIRST_COMPLETED)
+        if not render.done():
+            render.cancel()
+            writer.close()
+            return
+        hangup.cancel()
+
+        try:
+            png = render.result()
+        except asyncio.CancelledError:
+            # The render was dropped under us; the client may try again
+            await self._respond(writer, 503, b"tile render was cancelled, try again\n")
+            return
+        except Exception as error:
+            await self._respond(writer, 500, f"{error}\n".encode())
+            return
+        await self._respond(writer, 200, png, "image/png")
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: bytes,
+                       content_type: str = "text/plain"):
+        reasons = {200: "OK", 404: "Not Found", 405: "Method Not Allowed",
+                   500: "Internal Server Error", 503: "Service Unavailable"}
+        head = (
+            f"HTTP/1.1 {status} {reasons[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        try:
+            writer.write(head.encode() + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8000):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving tiles on http://{host}:{port}/{{z}}/{{x}}/{{y}}.png")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Mandelbrot map tiles on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--center", type=complex, default=complex(-0.75, 0.0))
+    parser.add_argument("--width", type=float, default=3.0,
+                        help="width (and height) of the level-0 tile")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--palette", default="turbo")
+    parser.add_argument("--palette-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of render processes (default: one per CPU)")
+    parser.add_argument("--cache-mb", type=int, default=256,
+                        help="memory for encoded tiles (default 256)")
+    args = parser.parse_args(argv)
+
+    server = TileServer(
+        args.center, args.width, MandelbrotSet(max_iterations=args.iterations),
+        args.palette, args.palette_size, args.workers, args.cache_mb << 20,
+    )
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()